@@ -0,0 +1,105 @@
+import argparse
+import random
+import json
+import sys
+import os
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_streaming_memory import create_behavior_payload
+from data_server import MashovServer
+
+SUBJECTS = ['מתמטיקה', 'אנגלית', 'פיזיקה', 'היסטוריה']
+LEVELS = ['3 יח"ל', '4 יח"ל', '5 יח"ל']
+
+
+def get_memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def create_student(rnd: random.Random) -> dict:
+    student_num = rnd.randint(0, 600)
+    return {'studentId': 300000000 + student_num, 'familyName': f'משפחה{student_num}',
+            'privateName': f'פרטי{student_num}', 'classCode': 'ט', 'classNum': student_num % 12 + 1}
+
+
+def create_all_grades_frame(num_of_grades: int) -> pd.DataFrame:
+    rnd = random.Random(num_of_grades)
+    rows = []
+    for _ in range(num_of_grades):
+        student = create_student(rnd)
+        rows.append({
+            'school_name': 'בית ספר', 'student_id': student['studentId'],
+            'student_name': f'{student["familyName"]} {student["privateName"]}', 'class_code': student['classCode'],
+            'class_num': student['classNum'], 'level': rnd.choice(LEVELS),
+            'exam_date': pd.Timestamp('2023-09-01') + pd.Timedelta(days=rnd.randint(0, 300)),
+            'exam_grade': rnd.randint(40, 100), 'exam_type': rnd.choice(['מבחן', 'בוחן']),
+            'exam_name': f'מבחן {rnd.randint(1, 20)}', 'exam_subject': rnd.choice(SUBJECTS)
+        })
+    return MashovServer.apply_schema(pd.DataFrame(rows), MashovServer.ALL_GRADES_SCHEMA)
+
+
+def create_semester_grades_frame(num_of_students: int) -> pd.DataFrame:
+    rnd = random.Random(num_of_students)
+    rows = []
+    for i in range(num_of_students):
+        rows.append({
+            'school_name': 'בית ספר', 'student_name': f'משפחה{i} פרטי{i}', 'class_code': 'ט',
+            'class_num': i % 12 + 1, 'level': rnd.choice(LEVELS), 'end_semester1': rnd.randint(40, 100),
+            'begin_semester2': rnd.randint(40, 100), 'end_semester2': rnd.randint(40, 100)
+        })
+    semester_grades_df = pd.DataFrame(rows, index=pd.Index(range(num_of_students), name='student_id'))
+    return MashovServer.apply_schema(semester_grades_df, MashovServer.SEMESTER_GRADES_SCHEMA)
+
+
+def create_phonebook_frame(num_of_students: int) -> pd.DataFrame:
+    rnd = random.Random(num_of_students)
+    data = []
+    for i in range(num_of_students):
+        details = {
+            'student': dict(create_student(rnd), studentId=300000000 + i, gender=rnd.choice(['ז', 'נ']),
+                            birthDate='2008-05-17T00:00:00', major=rnd.choice(SUBJECTS)),
+            'studentInfo': {'city1': rnd.choice(['עיר', 'כפר']), 'address1': f'רחוב {i}', 'cellphone1': f'05{i:08}'},
+            'contacts': [{'contact': {'contactId': i, 'privateName': 'הורה'}, 'contactInfo': {}}]
+        }
+        extra_data = {'OrTeacher': f'מורה {i % 12}', 'rama': rnd.choice(LEVELS), 'OrClass': f'ט{i % 12 + 1}'}
+        data.append([extract(details, extra_data) for extract in MashovServer.PHONEBOOK_EXTRACTORS.values()])
+    # built as get_students_phonebook builds it, before the student id becomes the index
+    phonebook_df = pd.DataFrame(data, columns=MashovServer.PHONEBOOK_COLUMNS)
+    phonebook_df['birthdate'] = pd.to_datetime(phonebook_df['birthdate'], format=MashovServer.DATE_FORMAT,
+                                               errors='coerce')
+    return MashovServer.apply_schema(phonebook_df, MashovServer.PHONEBOOK_SCHEMA)
+
+
+def print_frame_memory(name: str, typed_df: pd.DataFrame, schema: dict) -> None:
+    # the frame as it was before the schema: every column but the dates holds python objects
+    untyped_df = typed_df.astype({column: object for column, dtype in schema.items()
+                                  if column in typed_df and not dtype.startswith('datetime')})
+    untyped_mb, typed_mb = get_memory_mb(untyped_df), get_memory_mb(typed_df)
+    print(f'{name}, {len(typed_df)} rows: {untyped_mb:.1f}MB before, {typed_mb:.1f}MB after '
+          f'({untyped_mb / typed_mb:.1f}x smaller)')
+    for column in schema:
+        if column in typed_df:
+            print(f'{column:>22}: {untyped_df[column].memory_usage(deep=True) / 2 ** 20:8.1f}MB -> '
+                  f'{typed_df[column].memory_usage(deep=True) / 2 ** 20:6.1f}MB ({typed_df[column].dtype})')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Memory of the behavior, grades and phonebook frames with and '
+                                                 'without their typed schemas')
+    parser.add_argument('--events', type=int, default=500000)
+    parser.add_argument('--grades', type=int, default=100000)
+    parser.add_argument('--students', type=int, default=20000)
+    args = parser.parse_args()
+    behavior_df = MashovServer._parse_behavior_json(json.loads(create_behavior_payload(args.events)))
+    print_frame_memory('behavior', behavior_df, MashovServer.BEHAVIOR_SCHEMA)
+    print_frame_memory('all grades', create_all_grades_frame(args.grades), MashovServer.ALL_GRADES_SCHEMA)
+    print_frame_memory('semester grades', create_semester_grades_frame(args.students),
+                       MashovServer.SEMESTER_GRADES_SCHEMA)
+    print_frame_memory('phonebook', create_phonebook_frame(args.students), MashovServer.PHONEBOOK_SCHEMA)
+
+
+if __name__ == '__main__':
+    main()
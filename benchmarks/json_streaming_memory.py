@@ -0,0 +1,112 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from datetime import date, timedelta
+import subprocess
+import threading
+import argparse
+import random
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+EVENT_TYPES = ['נוכחות', 'חיסור', 'איחור', 'הפרעה', 'חיזוק חיובי']
+MODES = ('json', 'stream')
+
+
+def get_peak_rss_mb() -> float:
+    # on linux ru_maxrss survives exec and would include the parent's peak, VmHWM starts fresh in every process
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as status_file:
+            for line in status_file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2 ** 10
+    try:
+        import resource
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes while other unixes report kilobytes
+    return peak_rss / 2 ** 20 if sys.platform == 'darwin' else peak_rss / 2 ** 10
+
+
+def create_behavior_payload(num_of_events: int) -> bytes:
+    rnd = random.Random(num_of_events)
+    first_date = date(2023, 9, 1)
+    events = []
+    for i in range(num_of_events):
+        student_num = rnd.randint(0, 600)
+        events.append({
+            'student': {'studentId': 300000000 + student_num, 'familyName': f'משפחה{student_num}',
+                        'privateName': f'פרטי{student_num}', 'classCode': 'ט', 'classNum': student_num % 12 + 1},
+            'lessonLog': {'lessonDate': (first_date + timedelta(days=i % 300)).strftime('%Y-%m-%dT00:00:00'),
+                          'lesson': rnd.randint(1, 10)},
+            'teacher': {'teacherName': f'מורה {rnd.randint(1, 40)}'},
+            'subjectName': rnd.choice(['מתמטיקה', 'אנגלית', 'פיזיקה']),
+            'achva': {'name': rnd.choice(EVENT_TYPES)},
+            'achvaRemark': {'remarkText': rnd.choice(['', 'הערה'])},
+            'justifiedBy': {'teacherName': ''},
+            'achvaJustification': {'justification': rnd.choice(['ללא הערות', 'מוצדק'])},
+        })
+    return json.dumps(events, ensure_ascii=False).encode()
+
+
+def serve_payload(payload: bytes) -> ThreadingHTTPServer:
+    class PayloadHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PayloadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(mode: str, url: str) -> None:
+    import requests
+    from data_server import MashovServer
+    base_rss = get_peak_rss_mb()
+    res = requests.get(url, stream=mode == 'stream')
+    res.raise_for_status()
+    json_res = MashovServer.iter_json_array(res) if mode == 'stream' else res.json()
+    behavior_report_df = MashovServer._parse_behavior_json(json_res)
+    frame_mb = behavior_report_df.memory_usage(deep=True).sum() / 2 ** 20
+    peak_rss = get_peak_rss_mb()
+    print(json.dumps({'mode': mode, 'rows': len(behavior_report_df), 'frame_mb': frame_mb,
+                      'peak_rss_mb': peak_rss, 'peak_rss_growth_mb': peak_rss - base_rss}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Peak RSS of parsing a /behave response with res.json() vs streaming')
+    parser.add_argument('--events', type=int, default=500000)
+    parser.add_argument('--measure', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure, args.url)
+        return
+    payload = create_behavior_payload(args.events)
+    server = serve_payload(payload)
+    url = f'http://127.0.0.1:{server.server_port}/behave'
+    print(f'{args.events} events, {len(payload) / 2 ** 20:.1f}MB body')
+    try:
+        for mode in MODES:
+            # every mode runs in a fresh process, since the peak RSS of a process never goes down
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', mode, '--url', url],
+                                    check=True, capture_output=True, text=True).stdout
+            result = json.loads(output)
+            print(f'{mode:>6}: peak RSS {result["peak_rss_mb"]:.1f}MB (+{result["peak_rss_growth_mb"]:.1f}MB), '
+                  f'frame {result["frame_mb"]:.1f}MB, {result["rows"]} rows')
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,23 @@
 from datetime import datetime
+from datetime import timezone
+from datetime import timedelta
 from datetime import date
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from dateutil import relativedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 import pandas as pd
 import numpy as np
+import threading
+import random
+import time
+import requests.adapters
 import requests
 import urllib
+import hashlib
+import codecs
+import json
 import re
+import os
 
 
 class School:
@@ -44,6 +56,8 @@ class School:
 
 
 class Class:
+    __slots__ = ('_class_code', '_class_num', '_practitioner', '_level')
+
     def __init__(self, class_code: str, class_num: int, practitioner: str, level: str):
         self._class_code = class_code
         self._class_num = class_num
@@ -89,6 +103,630 @@ class Class:
         return str(self)
 
 
+class ClassesIndex:
+    KEY_NAMES = ['class_code', 'class_num']
+
+    def __init__(self, classes_details: Dict[str, Dict[int, 'Class']], no_level: str, archives_level: str):
+        self.no_level = no_level
+        self.levels: Dict[Tuple[str, int], str] = dict()
+        self.practitioners: Dict[Tuple[str, int], str] = dict()
+        # the highest class of every code is its archives, every class below it is active
+        self.archives_classes_nums = {class_code: max(class_numbers_dict.keys())
+                                      for class_code, class_numbers_dict in classes_details.items()}
+        self.num_of_active_classes = {class_code: archives_class_num - 1
+                                      for class_code, archives_class_num in self.archives_classes_nums.items()}
+        for class_code, class_numbers_dict in classes_details.items():
+            for class_num, class_details in class_numbers_dict.items():
+                is_archives = class_num == self.archives_classes_nums[class_code]
+                self.levels[(class_code, class_num)] = archives_level if is_archives else class_details.level
+                self.practitioners[(class_code, class_num)] = '' if is_archives else class_details.practitioner
+        classes_keys = pd.MultiIndex.from_arrays([[code for code, num in self.levels.keys()],
+                                                  [num for code, num in self.levels.keys()]], names=self.KEY_NAMES)
+        self._levels_table = pd.Series(list(self.levels.values()), index=classes_keys, dtype=object)
+        self._practitioners_table = pd.Series(list(self.practitioners.values()), index=classes_keys, dtype=object)
+        # pandas builds the lookup engine of an index lazily and not thread safely, so it's built before the index
+        # is shared between the threads of the concurrent parsers
+        classes_keys.get_indexer(classes_keys)
+
+    @staticmethod
+    def _map(table: pd.Series, classes_codes, classes_nums, default: str) -> np.ndarray:
+        classes_keys = pd.MultiIndex.from_arrays([classes_codes, classes_nums], names=ClassesIndex.KEY_NAMES)
+        return table.reindex(classes_keys).fillna(default).to_numpy()
+
+    def map_levels(self, classes_codes, classes_nums) -> np.ndarray:
+        return self._map(self._levels_table, classes_codes, classes_nums, self.no_level)
+
+    def map_practitioners(self, classes_codes, classes_nums) -> np.ndarray:
+        return self._map(self._practitioners_table, classes_codes, classes_nums, '')
+
+
+class _SharedHTTPAdapter(requests.adapters.HTTPAdapter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._requests_per_connection: Dict[int, int] = dict()
+        self._next_connection_num = 1
+
+    def send(self, request, *args, **kwargs):
+        response = super().send(request, *args, **kwargs)
+        raw_response = response.raw
+        connection = getattr(raw_response, 'connection', None) or getattr(raw_response, '_connection', None)
+        if connection is not None:
+            with self._stats_lock:
+                connection_num = getattr(connection, 'mashov_connection_num', None)
+                if connection_num is None:
+                    connection_num = self._next_connection_num
+                    self._next_connection_num += 1
+                    connection.mashov_connection_num = connection_num
+                self._requests_per_connection[connection_num] = self._requests_per_connection.get(connection_num, 0) + 1
+        return response
+
+    def close(self):
+        # the pool is shared by all sessions, closing one session must not drop the others' connections
+        pass
+
+    def shutdown(self):
+        super().close()
+
+    def get_requests_per_connection(self) -> Dict[int, int]:
+        with self._stats_lock:
+            return dict(self._requests_per_connection)
+
+
+class HttpTransport:
+    DEFAULT_POOL_CONNECTIONS = 4
+    DEFAULT_POOL_MAXSIZE = 16
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'HttpTransport':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def configure(cls, pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                  pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> 'HttpTransport':
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.shutdown()
+            cls._instance = cls(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            return cls._instance
+
+    def __init__(self, pool_connections: int = DEFAULT_POOL_CONNECTIONS, pool_maxsize: int = DEFAULT_POOL_MAXSIZE):
+        if pool_connections < 1 or pool_maxsize < 1:
+            raise ValueError(f'גודל מאגר החיבורים חייב להיות לפחות 1 ({pool_connections}, {pool_maxsize})')
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._adapter = _SharedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+    def create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount('https://', self._adapter)
+        session.mount('http://', self._adapter)
+        return session
+
+    def get_requests_per_connection(self) -> Dict[int, int]:
+        return self._adapter.get_requests_per_connection()
+
+    def get_connection_reuse_counters(self) -> Dict[int, int]:
+        return {num: num_of_requests - 1 for num, num_of_requests in self.get_requests_per_connection().items()}
+
+    @property
+    def num_of_connections(self) -> int:
+        return len(self.get_requests_per_connection())
+
+    @property
+    def num_of_reused_requests(self) -> int:
+        return sum(self.get_connection_reuse_counters().values())
+
+    def shutdown(self) -> None:
+        self._adapter.shutdown()
+
+
+class RequestScheduler:
+    DEFAULT_REQUESTS_PER_SECOND = 20.0
+    DEFAULT_BURST = 20
+    DEFAULT_MAX_CONCURRENT_PER_HOST = 6
+    DEFAULT_MAX_RETRIES = 4
+    DEFAULT_BACKOFF_BASE_SECONDS = 0.5
+    DEFAULT_BACKOFF_MAX_SECONDS = 16.0
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    RETRY_METHODS = ('GET', 'HEAD')
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'RequestScheduler':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def configure(cls, **kwargs) -> 'RequestScheduler':
+        with cls._instance_lock:
+            cls._instance = cls(**kwargs)
+            return cls._instance
+
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND, burst: int = DEFAULT_BURST,
+                 max_concurrent_per_host: int = DEFAULT_MAX_CONCURRENT_PER_HOST, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base_seconds: float = DEFAULT_BACKOFF_BASE_SECONDS,
+                 backoff_max_seconds: float = DEFAULT_BACKOFF_MAX_SECONDS):
+        if requests_per_second <= 0 or burst < 1 or max_concurrent_per_host < 1 or max_retries < 0:
+            raise ValueError('הגדרות תזמון הבקשות אינן תקינות!')
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_concurrent_per_host = max_concurrent_per_host
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._tokens_lock = threading.Lock()
+        self._hosts_semaphores: Dict[str, threading.BoundedSemaphore] = dict()
+        self._hosts_lock = threading.Lock()
+
+    def _acquire_token(self) -> None:
+        while True:
+            with self._tokens_lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.requests_per_second)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.requests_per_second
+            time.sleep(wait_seconds)
+
+    def _get_host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urllib.parse.urlsplit(url).netloc
+        with self._hosts_lock:
+            if host not in self._hosts_semaphores:
+                self._hosts_semaphores[host] = threading.BoundedSemaphore(self.max_concurrent_per_host)
+            return self._hosts_semaphores[host]
+
+    def _get_backoff_seconds(self, attempt: int, res: requests.Response = None) -> float:
+        retry_after = res.headers.get('Retry-After', '') if res is not None else ''
+        if retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max_seconds)
+        # "full jitter" exponential backoff, so parallel retries don't hit the server together
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+
+    @staticmethod
+    def _release_on_close(res: requests.Response, host_semaphore: threading.BoundedSemaphore) -> None:
+        # a streamed body is still downloading after the headers arrive, so its slot is held until it is closed
+        close = res.close
+        release_lock = threading.Lock()
+
+        def close_and_release() -> None:
+            try:
+                close()
+            finally:
+                if release_lock.acquire(blocking=False):
+                    host_semaphore.release()
+
+        res.close = close_and_release
+
+    def request(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        host_semaphore = self._get_host_semaphore(url)
+        # a failed login or any other non-idempotent request may have reached the server, so it is never sent again
+        max_retries = self.max_retries if method.upper() in self.RETRY_METHODS else 0
+        for attempt in range(max_retries + 1):
+            is_last_attempt = attempt == max_retries
+            self._acquire_token()
+            host_semaphore.acquire()
+            try:
+                res = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                host_semaphore.release()
+                if is_last_attempt:
+                    raise
+                time.sleep(self._get_backoff_seconds(attempt))
+                continue
+            except BaseException:
+                host_semaphore.release()
+                raise
+            if kwargs.get('stream'):
+                self._release_on_close(res, host_semaphore)
+            else:
+                host_semaphore.release()
+            if res.status_code in self.RETRY_STATUS_CODES and not is_last_attempt:
+                res.close()
+                time.sleep(self._get_backoff_seconds(attempt, res))
+                continue
+            return res
+
+
+class ResponseCache:
+    class Mode:
+        OFF = 'off'
+        RECORD = 'record'
+        REPLAY = 'replay'
+
+    DEFAULT_DIRECTORY = os.path.join('cache', 'responses')
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'ResponseCache':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def configure(cls, mode: str = Mode.OFF, directory: str = DEFAULT_DIRECTORY) -> 'ResponseCache':
+        with cls._instance_lock:
+            cls._instance = cls(mode=mode, directory=directory)
+            return cls._instance
+
+    def __init__(self, mode: str = Mode.OFF, directory: str = DEFAULT_DIRECTORY):
+        if mode not in (self.Mode.OFF, self.Mode.RECORD, self.Mode.REPLAY):
+            raise ValueError(f'{mode} אינו מצב מטמון תקין!')
+        self.mode = mode
+        self.directory = directory
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == self.Mode.RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == self.Mode.REPLAY
+
+    @staticmethod
+    def get_key(endpoint: str, school_id: int = None, school_year: int = None, class_code: str = None,
+                from_date: date = None, to_date: date = None) -> str:
+        key_parts = [endpoint, school_id, school_year, class_code,
+                     from_date.isoformat() if from_date else None, to_date.isoformat() if to_date else None]
+        return '|'.join('' if part is None else str(part) for part in key_parts)
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{hashlib.sha1(key.encode("utf-8")).hexdigest()}.json')
+
+    def load(self, key: str):
+        path = self._get_path(key)
+        if not os.path.exists(path):
+            raise ValueError(f'לא נמצאה תשובה שמורה עבור {key} (מצב הרצה לא מקוון)')
+        with open(path, encoding='utf-8') as response_file:
+            return json.load(response_file)['response']
+
+    def save(self, key: str, response) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._get_path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as response_file:
+            json.dump({'key': key, 'response': response}, response_file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class SchoolsDirectory:
+    URL = 'https://web.mashov.info/api/schools'
+    DEFAULT_CACHE_PATH = os.path.join('cache', 'schools_directory.json')
+    DEFAULT_TTL = timedelta(hours=12)
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'SchoolsDirectory':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def configure(cls, cache_path: str = DEFAULT_CACHE_PATH, ttl: timedelta = DEFAULT_TTL) -> 'SchoolsDirectory':
+        with cls._instance_lock:
+            cls._instance = cls(cache_path=cache_path, ttl=ttl)
+            return cls._instance
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, ttl: timedelta = DEFAULT_TTL):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._api_version = ''
+        self._schools: Dict[int, dict] = dict()
+        self._fetched_at = None
+        self._fetched_from_server = False
+
+    @property
+    def fetched_from_server(self) -> bool:
+        return self._fetched_from_server
+
+    def _is_fresh(self) -> bool:
+        return self._fetched_at is not None and datetime.now() - self._fetched_at < self.ttl
+
+    def _set_directory(self, api_version: str, schools_json: list, fetched_at: datetime) -> None:
+        self._api_version = api_version
+        self._schools = {school_detail['semel']: school_detail for school_detail in schools_json}
+        self._fetched_at = fetched_at
+
+    def _load_from_disk(self) -> None:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding='utf-8') as cache_file:
+                cached_versions = json.load(cache_file)
+            api_version, cached = max(cached_versions.items(), key=lambda item: item[1]['fetched_at'])
+            self._set_directory(api_version, cached['schools'], datetime.fromisoformat(cached['fetched_at']))
+        except (OSError, ValueError, KeyError, TypeError):
+            print(f'Warning: Schools directory cache "{self.cache_path}" is corrupted, ignoring it')
+
+    def _save_to_disk(self, schools_json: list) -> None:
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, encoding='utf-8') as cache_file:
+                cached_versions = json.load(cache_file)
+            if not isinstance(cached_versions, dict):
+                cached_versions = dict()
+        except (OSError, ValueError):
+            cached_versions = dict()
+        # every api version keeps its own entry, the newest fetched one is loaded
+        cached_versions[self._api_version] = {
+            'fetched_at': self._fetched_at.isoformat(),
+            'schools': schools_json
+        }
+        try:
+            cache_dir = os.path.dirname(self.cache_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f'{self.cache_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+                json.dump(cached_versions, cache_file, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            # the directory is already in memory, a cache that can't be written only costs a download next time
+            print(f'Warning: Failed to save the schools directory cache "{self.cache_path}": {e}')
+
+    def _fetch_from_server(self) -> None:
+        response_cache = ResponseCache.get_instance()
+        cache_key = response_cache.get_key('schools')
+        if response_cache.replaying:
+            cached_response = response_cache.load(cache_key)
+            api_version, schools_json = cached_response['apiversion'], cached_response['schools']
+        else:
+            session = HttpTransport.get_instance().create_session()
+            res = RequestScheduler.get_instance().request(session, 'GET', self.URL,
+                                                          headers={'User-Agent': MashovServer.CHROME_UA})
+            try:
+                res.raise_for_status()
+            except requests.exceptions.HTTPError:
+                raise requests.exceptions.HTTPError('אירעה שגיאה בזמן הורדת רשימת בתי הספר מהשרת')
+            api_version, schools_json = res.headers['apiversion'], res.json()
+            if response_cache.recording:
+                response_cache.save(cache_key, {'apiversion': api_version, 'schools': schools_json})
+        self._set_directory(api_version, schools_json, datetime.now())
+        self._fetched_from_server = True
+        self._save_to_disk(schools_json)
+
+    def get(self) -> Tuple[str, Dict[int, dict]]:
+        with self._lock:
+            if ResponseCache.get_instance().mode != ResponseCache.Mode.OFF and not self._fetched_from_server:
+                # the directory is recorded with the responses, so an offline run sees the same schools
+                self._fetch_from_server()
+            if not self._is_fresh():
+                self._load_from_disk()
+            if not self._is_fresh():
+                self._fetch_from_server()
+            return self._api_version, self._schools
+
+    def refresh(self) -> Tuple[str, Dict[int, dict]]:
+        with self._lock:
+            self._fetch_from_server()
+            return self._api_version, self._schools
+
+
+class GradesDataset:
+    def __init__(self, from_date: date, to_date: date, grades_json: list):
+        self.from_date = from_date
+        self.to_date = to_date
+        self.grades_json = grades_json
+        self._exams_datetimes = [self._parse_exam_datetime(grade) for grade in grades_json]
+        self._all_exams_dated = all(exam_datetime is not None for exam_datetime in self._exams_datetimes)
+
+    @staticmethod
+    def _parse_exam_datetime(grade: dict) -> Optional[datetime]:
+        exam_date = grade.get('gradingEvent', {}).get('eDate', '')
+        try:
+            exam_datetime = datetime.fromisoformat(exam_date.replace('Z', '+00:00'))
+        except (AttributeError, TypeError, ValueError):
+            return None
+        if exam_datetime.tzinfo is not None:
+            exam_datetime = exam_datetime.astimezone(timezone.utc).replace(tzinfo=None)
+        return exam_datetime
+
+    @staticmethod
+    def get_range_bounds(from_date: date, to_date: date) -> Tuple[datetime, datetime]:
+        # the same bounds the server gets in the start and end of the grades url
+        first_datetime = datetime.combine(from_date, datetime.min.time())
+        last_datetime = datetime.combine(to_date, datetime.min.time()) + timedelta(days=1, seconds=-1)
+        return first_datetime, last_datetime
+
+    def covers(self, from_date: date, to_date: date) -> bool:
+        if not (self.from_date <= from_date and to_date <= self.to_date):
+            return False
+        # the server's filter can't be reproduced for grades without a valid exam date, so only the whole
+        # downloaded range is served from a dataset that has such grades
+        is_whole_range = from_date <= self.from_date and self.to_date <= to_date
+        return is_whole_range or self._all_exams_dated
+
+    def get_grades(self, from_date: date, to_date: date) -> list:
+        assert self.covers(from_date, to_date), 'טווח התאריכים המבוקש חורג מטווח הציונים שהורד'
+        if from_date <= self.from_date and self.to_date <= to_date:
+            return self.grades_json
+        first_datetime, last_datetime = self.get_range_bounds(from_date, to_date)
+        return [grade for grade, exam_datetime in zip(self.grades_json, self._exams_datetimes)
+                if first_datetime <= exam_datetime <= last_datetime]
+
+
+class PhonebookCache:
+    def __init__(self):
+        self._phonebooks: Dict[Tuple[int, int, str, Tuple[str, ...]], pd.DataFrame] = dict()
+        self._phonebooks_locks: Dict[Tuple[int, int, str, Tuple[str, ...]], threading.Lock] = dict()
+        self._phonebooks_locks_lock = threading.Lock()
+
+    def _get_phonebook_lock(self, key: Tuple[int, int, str, Tuple[str, ...]]) -> threading.Lock:
+        with self._phonebooks_locks_lock:
+            if key not in self._phonebooks_locks:
+                self._phonebooks_locks[key] = threading.Lock()
+            return self._phonebooks_locks[key]
+
+    def get(self, school_id: int, school_year: int, class_code: str, columns: Sequence[str],
+            fetch_phonebook: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        # servers that extract different columns share the cache, so the columns are a part of the key
+        key = (school_id, school_year, class_code, tuple(columns))
+        with self._get_phonebook_lock(key):
+            if key not in self._phonebooks:
+                self._phonebooks[key] = fetch_phonebook()
+        # with copy on write a shallow copy is enough to keep a caller's changes out of the cached phonebook,
+        # without it the caller gets a copy of its own
+        return self._phonebooks[key].copy(deep=not self.copies_on_write())
+
+    @staticmethod
+    def copies_on_write() -> bool:
+        # pandas always copies on write from version 3, version 2 only when the option is turned on
+        pandas_major_version = int(pd.__version__.split('.')[0])
+        if pandas_major_version >= 3:
+            return True
+        return pandas_major_version == 2 and pd.get_option('mode.copy_on_write') is True
+
+    def clear(self) -> None:
+        with self._phonebooks_locks_lock:
+            self._phonebooks.clear()
+
+
+class BehaviorEventStore:
+    DEFAULT_DIRECTORY = os.path.join('cache', 'behavior')
+    DEFAULT_LOOKBACK_DAYS = 14
+    UNDATED_EVENTS_KEY = ''
+    _files_locks: Dict[str, threading.Lock] = dict()
+    _files_locks_lock = threading.Lock()
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, lookback_days: int = DEFAULT_LOOKBACK_DAYS):
+        if lookback_days < 0:
+            raise ValueError(f'חלון ההשלמה חייב להיות אי-שלילי, לא {lookback_days}')
+        self.directory = directory
+        self.lookback = timedelta(days=lookback_days)
+
+    @staticmethod
+    def _get_event_day(event: dict) -> str:
+        lesson_date = event.get('lessonLog', {}).get('lessonDate', '')
+        try:
+            return date.fromisoformat(lesson_date[:10]).isoformat()
+        except (TypeError, ValueError):
+            return BehaviorEventStore.UNDATED_EVENTS_KEY
+
+    def _get_path(self, school_id: int, school_year: int, class_code: str) -> str:
+        return os.path.join(self.directory, f'{school_id}_{school_year}_{class_code}.json')
+
+    def _get_file_lock(self, path: str) -> threading.Lock:
+        with self._files_locks_lock:
+            if path not in self._files_locks:
+                self._files_locks[path] = threading.Lock()
+            return self._files_locks[path]
+
+    def _load(self, path: str) -> dict:
+        empty_store = {'synced_from': None, 'synced_to': None, 'days': dict(), 'undated': []}
+        if not os.path.exists(path):
+            return empty_store
+        try:
+            with open(path, encoding='utf-8') as store_file:
+                store = json.load(store_file)
+            store['synced_from'] = date.fromisoformat(store['synced_from'])
+            store['synced_to'] = date.fromisoformat(store['synced_to'])
+            store.setdefault('undated', [])
+            # stores saved before undated events were kept per fetched range hold them under an empty day
+            legacy_undated_events = store['days'].pop(self.UNDATED_EVENTS_KEY, None)
+            if legacy_undated_events:
+                store['undated'].append([store['synced_from'].isoformat(), store['synced_to'].isoformat(),
+                                         legacy_undated_events])
+            return store
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            print(f'Warning: Behavior events store "{path}" is corrupted, downloading it again')
+            return empty_store
+
+    def _save(self, path: str, store: dict) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        store_to_save = dict(store, synced_from=store['synced_from'].isoformat(),
+                             synced_to=store['synced_to'].isoformat())
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as store_file:
+            json.dump(store_to_save, store_file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def get_ranges_to_fetch(self, store: dict, from_date: date, to_date: date) -> List[Tuple[date, date]]:
+        synced_from, synced_to = store['synced_from'], store['synced_to']
+        if synced_from is None or synced_to is None:
+            return [(from_date, to_date)]
+        ranges = []
+        if from_date < synced_from:
+            ranges.append((from_date, min(to_date, synced_from - timedelta(days=1))))
+        # days since the last sync, plus a look-back window to catch events edited after they were synced
+        tail_from_date = max(synced_from, synced_to + timedelta(days=1) - self.lookback)
+        if tail_from_date <= to_date:
+            if ranges and ranges[-1][1] >= tail_from_date - timedelta(days=1):
+                ranges[-1] = (ranges[-1][0], to_date)
+            else:
+                ranges.append((tail_from_date, to_date))
+        return ranges
+
+    @staticmethod
+    def _update_synced_range(store: dict, from_date: date, to_date: date) -> None:
+        synced_to = min(to_date, date.today())
+        if store['synced_from'] is None or store['synced_to'] is None:
+            store['synced_from'], store['synced_to'] = from_date, synced_to
+            return
+        # the synced range must stay contiguous, a fetch that ends before it leaves a gap of unfetched days
+        if to_date >= store['synced_from'] - timedelta(days=1):
+            store['synced_from'] = min(store['synced_from'], from_date)
+        store['synced_to'] = max(store['synced_to'], synced_to)
+
+    def sync(self, school_id: int, school_year: int, class_code: str, from_date: date, to_date: date,
+             fetch_events: Callable[[date, date], list]) -> list:
+        path = self._get_path(school_id, school_year, class_code)
+        with self._get_file_lock(path):
+            store = self._load(path)
+            days = store['days']
+            ranges_to_fetch = self.get_ranges_to_fetch(store, from_date, to_date)
+            for fetch_from_date, fetch_to_date in ranges_to_fetch:
+                fetched_days = dict()
+                for event in fetch_events(fetch_from_date, fetch_to_date):
+                    fetched_days.setdefault(self._get_event_day(event), []).append(event)
+                # a fetched range is authoritative: its days replace the stored ones, deleted events included
+                first_day, last_day = fetch_from_date.isoformat(), fetch_to_date.isoformat()
+                for day in [day for day in days.keys() if first_day <= day <= last_day]:
+                    del days[day]
+                # undated events can't be placed on a day, so they are kept with the range they were fetched in
+                store['undated'] = [undated for undated in store['undated']
+                                    if not first_day <= undated[0] <= undated[1] <= last_day]
+                undated_events = fetched_days.pop(self.UNDATED_EVENTS_KEY, None)
+                if undated_events:
+                    store['undated'].append([first_day, last_day, undated_events])
+                days.update(fetched_days)
+            if ranges_to_fetch:
+                self._update_synced_range(store, from_date, to_date)
+                self._save(path, store)
+        first_day, last_day = from_date.isoformat(), to_date.isoformat()
+        events = []
+        for day in sorted(days.keys()):
+            if first_day <= day <= last_day:
+                events.extend(days[day])
+        # overlapping fetched ranges may hold the same undated event more than once
+        seen_undated_events = set()
+        for undated_first_day, undated_last_day, undated_events in store['undated']:
+            if undated_first_day <= last_day and first_day <= undated_last_day:
+                for event in undated_events:
+                    event_key = json.dumps(event, sort_keys=True, ensure_ascii=False)
+                    if event_key not in seen_undated_events:
+                        seen_undated_events.add(event_key)
+                        events.append(event)
+        return events
+
+
 class MashovServer:
     class ClassLevel:
         NO_LEVEL = 'ללא'
@@ -144,7 +782,130 @@ class MashovServer:
     LOGOUT_URL = f'{BASE_URL}/api/logout'
     FAILED_GRADE_THRESHOLD = 56
     DATE_FORMAT = '%d/%m/%Y'
+    API_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+    # every column has its own extractor, so a parser asked for some of the columns never touches the others
+    BEHAVIOR_EXTRACTORS: Dict[str, Callable[[dict], Any]] = {
+        'teacher_name': lambda event: event.get('teacher', {}).get('teacherName', ''),
+        'subject': lambda event: event.get('subjectName', ''),
+        'lesson_date': lambda event: event.get('lessonLog', {}).get('lessonDate', ''),
+        'lesson_num': lambda event: event.get('lessonLog', {}).get('lesson', ''),
+        'student_id': lambda event: event.get('student', {}).get('studentId', ''),
+        'student_name': lambda event: MashovServer.get_student_name(event.get('student', {})),
+        'class_code': lambda event: event.get('student', {}).get('classCode', ''),
+        'class_num': lambda event: event.get('student', {}).get('classNum', ''),
+        'event_type': lambda event: event.get('achva', {}).get('name', ''),
+        'remark': lambda event: event.get('achvaRemark', {}).get('remarkText', ''),
+        'justified_by': lambda event: event.get('justifiedBy', {}).get('teacherName', ''),
+        'justification': lambda event: event.get('achvaJustification', {}).get('justification', '')
+    }
+    BEHAVIOR_COLUMNS = list(BEHAVIOR_EXTRACTORS)
+    # repeated strings are categorical, so every value is stored once per frame and rows hold small codes
+    BEHAVIOR_SCHEMA = {
+        'teacher_name': 'category',
+        'subject': 'category',
+        'lesson_date': 'datetime64[ns]',
+        'lesson_num': 'int8',
+        'student_id': 'int64',
+        'student_name': 'category',
+        'class_code': 'category',
+        'class_num': 'int8',
+        'event_type': 'category',
+        'remark': 'category',
+        'justified_by': 'category',
+        'justification': 'category'
+    }
+    SEMESTER_GRADES_SCHEMA = {
+        'school_name': 'category',
+        'class_code': 'category',
+        'class_num': 'int8',
+        'level': 'category'
+    }
+    ALL_GRADES_SCHEMA = {
+        'school_name': 'category',
+        'student_id': 'int64',
+        'student_name': 'category',
+        'class_code': 'category',
+        'class_num': 'int8',
+        'level': 'category',
+        'exam_date': 'datetime64[ns]',
+        'exam_type': 'category',
+        'exam_name': 'category',
+        'exam_subject': 'category'
+    }
+    # the extractors get the student's details and the student's extra data
+    PHONEBOOK_EXTRACTORS: Dict[str, Callable[[dict, dict], Any]] = {
+        'student_id': lambda details, extra_data: str(details.get('student', {}).get('studentId', '')),
+        'family_name': lambda details, extra_data: details.get('student', {}).get('familyName', ''),
+        'private_name': lambda details, extra_data: details.get('student', {}).get('privateName', ''),
+        'gender': lambda details, extra_data: details.get('student', {}).get('gender', ''),
+        'class_code': lambda details, extra_data: details.get('student', {}).get('classCode', ''),
+        'class_num': lambda details, extra_data: details.get('student', {}).get('classNum', ''),
+        'birthdate': lambda details, extra_data: MashovServer.format_birthdate(
+            details.get('student', {}).get('birthDate', '')),
+        'heb_birthdate': lambda details, extra_data: details.get('student', {}).get('hebrewBirthDate', ''),
+        'study_trend': lambda details, extra_data: details.get('student', {}).get('major', ''),
+        'main_city': lambda details, extra_data: details.get('studentInfo', {}).get('city1', ''),
+        'main_address': lambda details, extra_data: details.get('studentInfo', {}).get('address1', ''),
+        'sec_city': lambda details, extra_data: details.get('studentInfo', {}).get('city2', ''),
+        'sec_address': lambda details, extra_data: details.get('studentInfo', {}).get('address2', ''),
+        'home_phone': lambda details, extra_data: details.get('studentInfo', {}).get('phone1', ''),
+        'student_mail': lambda details, extra_data: details.get('studentInfo', {}).get('email1', ''),
+        'student_phone_num': lambda details, extra_data: details.get('studentInfo', {}).get('cellphone1', ''),
+        'parent1_id': lambda details, extra_data: MashovServer.get_parent_json(details, 0).get(
+            'contact', {}).get('contactId', ''),
+        'parent1_name': lambda details, extra_data: MashovServer.get_parent_json(details, 0).get(
+            'contact', {}).get('privateName', ''),
+        'parent1_mail': lambda details, extra_data: MashovServer.get_parent_json(details, 0).get(
+            'contactInfo', {}).get('email1', ''),
+        'parent1_phone_num': lambda details, extra_data: MashovServer.get_parent_json(details, 0).get(
+            'contactInfo', {}).get('cellphone1', ''),
+        'parent2_id': lambda details, extra_data: MashovServer.get_parent_json(details, 1).get(
+            'contact', {}).get('contactId', ''),
+        'parent2_name': lambda details, extra_data: MashovServer.get_parent_json(details, 1).get(
+            'contact', {}).get('privateName', ''),
+        'parent2_mail': lambda details, extra_data: MashovServer.get_parent_json(details, 1).get(
+            'contactInfo', {}).get('email1', ''),
+        'parent2_phone_num': lambda details, extra_data: MashovServer.get_parent_json(details, 1).get(
+            'contactInfo', {}).get('cellphone1', ''),
+        'edge_means': lambda details, extra_data: '',
+        'num_brothers': lambda details, extra_data: extra_data.get('NoBro', ''),
+        'num_computers': lambda details, extra_data: extra_data.get('NoCom', ''),
+        'original_class': lambda details, extra_data: extra_data.get('OrClass', ''),
+        'original_teacher': lambda details, extra_data: extra_data.get('OrTeacher', ''),
+        'level': lambda details, extra_data: extra_data.get('rama', ''),
+        'saturday_practitioner': lambda details, extra_data: extra_data.get('Sat', ''),
+        'material_help': lambda details, extra_data: '',
+        'home_visits': lambda details, extra_data: ''
+    }
+    PHONEBOOK_COLUMNS = list(PHONEBOOK_EXTRACTORS)
+    # the grades reports and the classes roster read these, so they are extracted whatever the caller asked for
+    PHONEBOOK_REQUIRED_COLUMNS = ['student_id', 'family_name', 'private_name', 'class_code', 'class_num',
+                                  'original_teacher']
+    PHONEBOOK_SCHEMA = {
+        'student_id': 'int64',
+        'gender': 'category',
+        'class_code': 'category',
+        'class_num': 'int8',
+        'birthdate': 'datetime64[ns]',
+        'study_trend': 'category',
+        'main_city': 'category',
+        'sec_city': 'category',
+        'original_class': 'category',
+        'original_teacher': 'category',
+        'level': 'category',
+        'saturday_practitioner': 'category'
+    }
+    INTEGER_DTYPES = ['int8', 'int16', 'int32', 'int64']
+    ID_COLUMNS = ['student_id']
     EXAM_TYPE_WORD = 'מבחן'
+    SCHOOL_YEAR_FIRST_MONTH, SCHOOL_YEAR_FIRST_DAY = 8, 1
+    SCHOOL_YEAR_LAST_MONTH, SCHOOL_YEAR_LAST_DAY = 11, 30
+    DEFAULT_MAX_PARALLEL_REQUESTS = 5
+    DEFAULT_BEHAVIOR_WINDOW_MONTHS = 1
+    CLASS_NAME_REGEX = re.compile(r'(?P<practitioner>[א-ת ]+?) *- *(?P<level>.?\d.? יח\"?ל)')
+    JSON_STREAM_CHUNK_SIZE = 64 * 1024
+    JSON_WHITESPACE_REGEX = re.compile(r'[ \t\n\r]*')
+    JSON_ELEMENT_DELIMITERS = (' ', '\t', '\n', '\r', ',', ']')
 
     @staticmethod
     def map_heb_year_to_greg(heb_year: str) -> int:
@@ -163,22 +924,58 @@ class MashovServer:
         assert heb_year, f'{greg_year} אינה שנה לועזית תקינה!'
         return heb_year
 
-    def __init__(self, school_id: int, school_year: str):
-        res = requests.get('https://web.mashov.info/api/schools', headers={'User-Agent': self.CHROME_UA})
+    @staticmethod
+    def select_columns(columns: Optional[Sequence[str]], all_columns: Sequence[str],
+                       required_columns: Sequence[str] = ()) -> List[str]:
+        if columns is None:
+            return list(all_columns)
+        unknown_columns = set(columns).difference(all_columns)
+        if unknown_columns:
+            raise ValueError(f'עמודות לא מוכרות: {", ".join(sorted(unknown_columns))}')
+        # the selected columns keep the original order, whatever the order they were asked in
+        selected_columns = set(columns).union(required_columns)
+        return [column for column in all_columns if column in selected_columns]
+
+    @staticmethod
+    def get_student_name(student_json: dict) -> str:
+        return f'{student_json.get("familyName", "")} {student_json.get("privateName", "")}'
+
+    @staticmethod
+    def get_parent_json(details: dict, parent_idx: int) -> dict:
+        contacts_list = details.get('contacts', [])
+        return contacts_list[parent_idx] if len(contacts_list) > parent_idx else {}
+
+    @staticmethod
+    def format_birthdate(birthdate: str) -> str:
         try:
-            res.raise_for_status()
-        except requests.exceptions.HTTPError:
-            raise requests.exceptions.HTTPError('אירעה שגיאה בזמן הורדת רשימת בתי הספר מהשרת')
-        all_schools_json = res.json()
-        self._api_version = res.headers['apiversion']
-        self._all_schools = dict()
-        for school_detail in all_schools_json:
-            self._all_schools[school_detail.pop('semel')] = school_detail
+            return datetime.strptime(birthdate, MashovServer.API_DATETIME_FORMAT).strftime(MashovServer.DATE_FORMAT)
+        except:
+            if birthdate:
+                msg = f'Warning: Student birthdate format changed! ' \
+                      f'("{birthdate}" instead of {MashovServer.API_DATETIME_FORMAT})'
+                print(msg)
+            return birthdate
+
+    @staticmethod
+    def get_school_year_dates(greg_year: int) -> Tuple[date, date]:
+        first_date = date(greg_year - 1, MashovServer.SCHOOL_YEAR_FIRST_MONTH, MashovServer.SCHOOL_YEAR_FIRST_DAY)
+        last_date = date(greg_year, MashovServer.SCHOOL_YEAR_LAST_MONTH, MashovServer.SCHOOL_YEAR_LAST_DAY)
+        return first_date, last_date
+
+    def __init__(self, school_id: int, school_year: str, max_parallel_requests: int = DEFAULT_MAX_PARALLEL_REQUESTS,
+                 behavior_store: BehaviorEventStore = None,
+                 behavior_window_months: int = DEFAULT_BEHAVIOR_WINDOW_MONTHS, stream_responses: bool = False,
+                 phonebook_cache: PhonebookCache = None, behavior_columns: Sequence[str] = None,
+                 phonebook_columns: Sequence[str] = None):
+        schools_directory = SchoolsDirectory.get_instance()
+        self._api_version, self._all_schools = schools_directory.get()
+        if school_id not in self._all_schools.keys() and not schools_directory.fetched_from_server:
+            # the cached directory may be older than a newly added school
+            self._api_version, self._all_schools = schools_directory.refresh()
         self.school = school_id
         self.school_year = school_year
-        self._session = requests.Session()
+        self._session = HttpTransport.get_instance().create_session()
         const_headers = {
-            'Connection': 'close',
             'User-Agent': self.CHROME_UA,
             'Accept': 'application/json, text/plain, */*',
         }
@@ -187,7 +984,17 @@ class MashovServer:
         self._auth_json_response = dict()
         self._logged_in = False
         self.classes_details: Dict[str, Dict[int, Class]] = dict()
-        self._phonebook_df = None
+        self.classes_index = ClassesIndex(self.classes_details, self.ClassLevel.NO_LEVEL, self.ClassLevel.ARCHIVES)
+        self.phonebook_cache = phonebook_cache if phonebook_cache is not None else PhonebookCache()
+        self._grades_datasets: Dict[str, GradesDataset] = dict()
+        self._grades_lock = threading.Lock()
+        self.max_parallel_requests = max(1, max_parallel_requests)
+        self.behavior_store = behavior_store
+        self.behavior_window_months = behavior_window_months
+        self.stream_responses = stream_responses
+        self.behavior_columns = self.select_columns(behavior_columns, self.BEHAVIOR_COLUMNS)
+        self.phonebook_columns = self.select_columns(phonebook_columns, self.PHONEBOOK_COLUMNS,
+                                                     self.PHONEBOOK_REQUIRED_COLUMNS)
 
     @property
     def school(self) -> School:
@@ -220,8 +1027,8 @@ class MashovServer:
     def assert_logged_in(self):
         assert self._logged_in, 'עלייך להתחבר תחילה!'
 
-    def login(self, username: str, password: str) -> None:
-        login_json_data = {
+    def _get_login_json_data(self, username: str, password: str) -> dict:
+        return {
             'apiVersion': self._api_version,
             'appBuild': self._api_version,
             'appName': 'info.mashov.teachers',
@@ -236,9 +1043,28 @@ class MashovServer:
             'username': username,
             'year': self.school_year
         }
-        self._session.get(self.LOGIN_PAGE_URL)
-        self._session.get(self.CLEAR_SESSION_URL, headers={'Referer': self.LOGIN_PAGE_URL})
-        res = self._session.post(self.LOGIN_API_URL, headers={'Referer': self.LOGIN_PAGE_URL}, json=login_json_data)
+
+    def login(self, username: str, password: str) -> None:
+        if ResponseCache.get_instance().replaying:
+            self._logged_in = True
+            self.get_classes_details()
+            return
+        self._request('GET', self.LOGIN_PAGE_URL)
+        self._request('GET', self.CLEAR_SESSION_URL, headers={'Referer': self.LOGIN_PAGE_URL})
+        res = self._request('POST', self.LOGIN_API_URL, headers={'Referer': self.LOGIN_PAGE_URL},
+                            json=self._get_login_json_data(username, password))
+        if not res.ok:
+            # a cached directory may hold an api version the server no longer accepts, so it is downloaded again,
+            # unless it was already downloaded by this run
+            schools_directory = SchoolsDirectory.get_instance()
+            if schools_directory.fetched_from_server:
+                api_version, _ = schools_directory.get()
+            else:
+                api_version, _ = schools_directory.refresh()
+            if api_version != self._api_version:
+                self._api_version = api_version
+                res = self._request('POST', self.LOGIN_API_URL, headers={'Referer': self.LOGIN_PAGE_URL},
+                                    json=self._get_login_json_data(username, password))
         try:
             res.raise_for_status()
         except requests.exceptions.HTTPError:
@@ -249,256 +1075,393 @@ class MashovServer:
         self._logged_in = True
         self.get_classes_details()
 
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        return RequestScheduler.get_instance().request(self._session, method, url, **kwargs)
+
+    def _get_api_headers(self) -> dict:
+        return {
+            'Referer': self.MAIN_DASHBOARD_PAGE_URL,
+            'X-Csrf-Token': self._csrf_token
+        }
+
+    def _get_api_url(self, endpoint: str, class_code: str = None, from_date: date = None, to_date: date = None) -> str:
+        url = f'{self.BASE_URL}/api/classes'
+        if class_code is not None:
+            url = f'{url}/{urllib.parse.quote(class_code)}/{endpoint}'
+        if from_date is not None and to_date is not None:
+            start = f"{from_date.strftime('%Y-%m-%d')}T00:00:00Z"
+            end = f"{to_date.strftime('%Y-%m-%d')}T23:59:59Z"
+            url = f'{url}?start={start}&end={end}'
+        return url
+
+    def _get_json(self, endpoint: str, class_code: str = None, from_date: date = None, to_date: date = None,
+                  stream: bool = False):
+        self.assert_logged_in()
+        response_cache = ResponseCache.get_instance()
+        cache_key = response_cache.get_key(endpoint, self.school.school_id, self.school_year, class_code,
+                                           from_date, to_date)
+        if response_cache.replaying:
+            return response_cache.load(cache_key)
+        # a recorded response is saved whole, so it is never streamed
+        stream = stream and not response_cache.recording
+        url = self._get_api_url(endpoint, class_code, from_date, to_date)
+        res = self._request('GET', url, headers=self._get_api_headers(), stream=stream)
+        try:
+            res.raise_for_status()
+        except requests.exceptions.HTTPError:
+            # a streamed response holds its connection until it is closed
+            res.close()
+            raise
+        if stream:
+            return self.iter_json_array(res)
+        json_res = res.json()
+        if response_cache.recording:
+            response_cache.save(cache_key, json_res)
+        return json_res
+
+    @staticmethod
+    def iter_json_array(res: requests.Response, chunk_size: int = JSON_STREAM_CHUNK_SIZE) -> Iterator[Any]:
+        # decodes the body chunk by chunk and yields the array elements one at a time,
+        # so neither the whole body nor the whole object tree is ever held in memory
+        json_decoder = json.JSONDecoder()
+        text_decoder = codecs.getincrementaldecoder(res.encoding or 'utf-8')()
+        chunks = res.iter_content(chunk_size=chunk_size)
+        buffer, position = '', 0
+        array_opened = body_ended = False
+        try:
+            while True:
+                position = MashovServer.JSON_WHITESPACE_REGEX.match(buffer, position).end()
+                if position < len(buffer):
+                    char = buffer[position]
+                    if not array_opened:
+                        if char != '[':
+                            raise ValueError(f'תשובת השרת מ-{res.url} אינה רשימה')
+                        array_opened = True
+                        position += 1
+                        continue
+                    if char == ']':
+                        return
+                    if char == ',':
+                        position += 1
+                        continue
+                    try:
+                        element, element_end = json_decoder.raw_decode(buffer, position)
+                    except json.JSONDecodeError:
+                        element_end = None
+                    # an element which is not followed by a delimiter may continue in the next chunk (e.g. -1|.5)
+                    if element_end is not None and (
+                            buffer[element_end:element_end + 1] in MashovServer.JSON_ELEMENT_DELIMITERS or body_ended):
+                        position = element_end
+                        yield element
+                        continue
+                if body_ended:
+                    raise ValueError(f'תשובת השרת מ-{res.url} נקטעה או אינה JSON תקין')
+                chunk = next(chunks, None)
+                if chunk is None:
+                    body_ended = True
+                    buffer = buffer[position:] + text_decoder.decode(b'', final=True)
+                else:
+                    buffer = buffer[position:] + text_decoder.decode(chunk)
+                position = 0
+        finally:
+            res.close()
+
+    def fetch_concurrently(self, tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        # every task fetches and parses its own response, so parsing starts as soon as that response lands
+        self.assert_logged_in()
+        if not tasks:
+            return dict()
+        num_of_workers = min(self.max_parallel_requests, len(tasks))
+        with ThreadPoolExecutor(max_workers=num_of_workers) as executor:
+            futures = {key: executor.submit(task) for key, task in tasks.items()}
+            return {key: future.result() for key, future in futures.items()}
+
     def logout(self) -> None:
         if not self._logged_in:
             return
-        self._session.get(self.LOGOUT_URL, headers={'Referer': self.MAIN_DASHBOARD_PAGE_URL})
+        if ResponseCache.get_instance().replaying:
+            self._logged_in = False
+            return
+        self._request('GET', self.LOGOUT_URL, headers={'Referer': self.MAIN_DASHBOARD_PAGE_URL})
         self._session.close()
         self._logged_in = False
 
-    def get_behavior_report_by_dates(self, from_date: date, to_date: date, class_code: str) -> pd.DataFrame:
+    @staticmethod
+    def _parse_api_dates(dates: pd.Series, dates_description: str) -> pd.Series:
+        parsed_dates = pd.to_datetime(dates, format=MashovServer.API_DATETIME_FORMAT, errors='coerce')
+        num_of_malformed_dates = int((parsed_dates.isna() & dates.notna() & (dates != '')).sum())
+        if num_of_malformed_dates:
+            print(f'Warning: {dates_description} format changed! '
+                  f'({num_of_malformed_dates} dates are not in {MashovServer.API_DATETIME_FORMAT} format)')
+        return parsed_dates.dt.normalize()
+
+    @staticmethod
+    def get_integer_dtype(values: pd.Series, dtype: str) -> str:
+        # the schema's type is the smallest one tried, a column out of its range gets the next type that holds it
+        present_values = values.dropna()
+        for integer_dtype in MashovServer.INTEGER_DTYPES[MashovServer.INTEGER_DTYPES.index(dtype):]:
+            dtype_info = np.iinfo(integer_dtype)
+            if present_values.empty or (dtype_info.min <= present_values.min() and
+                                        present_values.max() <= dtype_info.max):
+                return integer_dtype
+        raise ValueError(f'הערכים של {values.name} חורגים מטווח המספרים השלמים')
+
+    @staticmethod
+    def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+        typed_columns = dict()
+        for column, dtype in schema.items():
+            if column not in df:
+                continue
+            if pd.api.types.is_integer_dtype(dtype):
+                if column in MashovServer.ID_COLUMNS:
+                    # a missing id stays missing, but an id that isn't a number is an error and is never coerced
+                    values = pd.to_numeric(df[column].replace('', np.nan))
+                else:
+                    values = pd.to_numeric(df[column], errors='coerce')
+                dtype = MashovServer.get_integer_dtype(values, dtype)
+                # numpy integers can't hold a missing value, the nullable integer type of the same size can
+                typed_columns[column] = values.astype(dtype if values.notna().all() else dtype.capitalize())
+            else:
+                typed_columns[column] = df[column].astype(dtype)
+        return df.assign(**typed_columns)
+
+    def split_to_windows(self, from_date: date, to_date: date) -> List[Tuple[date, date]]:
+        if self.behavior_window_months < 1:
+            return [(from_date, to_date)]
+        windows = []
+        window_from_date = from_date
+        while window_from_date <= to_date:
+            next_window_first_date = window_from_date.replace(day=1) + relativedelta.relativedelta(
+                months=self.behavior_window_months)
+            window_to_date = min(to_date, next_window_first_date - timedelta(days=1))
+            windows.append((window_from_date, window_to_date))
+            window_from_date = next_window_first_date
+        return windows
+
+    def get_classes_filter(self, drop_archives: bool = False,
+                           classes_nums: Sequence[int] = None) -> Optional[Callable[[str, int], bool]]:
+        if not drop_archives and classes_nums is None:
+            return None
+        classes_nums = set(classes_nums) if classes_nums is not None else None
+        classes_levels = self.classes_index.levels
+
+        def keep_class(class_code: str, class_num: int) -> bool:
+            if drop_archives and classes_levels.get((class_code, class_num)) == self.ClassLevel.ARCHIVES:
+                return False
+            return classes_nums is None or class_num in classes_nums
+
+        return keep_class
+
+    def get_behavior_report_by_dates(self, from_date: date, to_date: date, class_code: str, drop_archives: bool = False,
+                                     classes_nums: Sequence[int] = None) -> pd.DataFrame:
         self.assert_logged_in()
+        # events of filtered out classes are skipped while parsing, so they never reach the frame
+        keep_class = self.get_classes_filter(drop_archives, classes_nums)
+        # recorded responses are keyed by the requested window, the store's sync windows would never match them
+        if self.behavior_store is not None and ResponseCache.get_instance().mode == ResponseCache.Mode.OFF:
 
-        def parse_json_res(res_obj: dict) -> list:
-            student_json = res_obj.get('student', {})
-            lesson_log_json = res_obj.get('lessonLog', {})
-            teacher_json = res_obj.get('teacher', {})
-            achva_json = res_obj.get('achva', {})
-            achva_remark_json = res_obj.get('achvaRemark', {})
-            justified_by_json = res_obj.get('justifiedBy', {})
-            achva_justification_json = res_obj.get('achvaJustification', {})
-            lesson_date = lesson_log_json.get('lessonDate', '')
-            date_format = '%Y-%m-%dT%H:%M:%S'
-            try:
-                lesson_date = datetime.strptime(lesson_date, date_format).strftime('%d/%m/%Y')
-            except:
-                if lesson_date:
-                    print(f'Warning: Lesson date format changed! ("{lesson_date}" instead of {date_format})')
-            required_data = [
-                teacher_json.get('teacherName', ''),
-                res_obj.get('subjectName', ''),
-                lesson_date,
-                lesson_log_json.get('lesson', ''),
-                student_json.get('studentId', ''),
-                f'{student_json.get("familyName", "")} {student_json.get("privateName", "")}',
-                student_json.get('classCode', ''),
-                student_json.get('classNum', ''),
-                achva_json.get('name', ''),
-                achva_remark_json.get('remarkText', ''),
-                justified_by_json.get('teacherName', ''),
-                achva_justification_json.get('justification', '')
-            ]
-            return required_data
-
-        encoded_class = urllib.parse.quote(class_code)
-        from_date = f"{from_date.strftime('%Y-%m-%d')}T00:00:00Z"
-        to_date = f"{to_date.strftime('%Y-%m-%d')}T23:59:59Z"
-        url = f'{self.BASE_URL}/api/classes/{encoded_class}/behave?start={from_date}&end={to_date}'
-        res = self._session.get(url, headers={'Referer': self.MAIN_DASHBOARD_PAGE_URL})
-        json_res = res.json()
-        columns = ['teacher_name', 'subject', 'lesson_date', 'lesson_num', 'student_id', 'student_name', 'class_code',
-                   'class_num', 'event_type', 'remark', 'justified_by', 'justification']
-        data = [parse_json_res(v) for v in json_res]
-        behavior_report_df = pd.DataFrame(data, columns=columns)
-        behavior_report_df['lesson_date'] = pd.to_datetime(behavior_report_df['lesson_date'], format=self.DATE_FORMAT)
-        return behavior_report_df
+            def fetch_events(fetch_from_date: date, fetch_to_date: date) -> list:
+                return self._fetch_behavior_json_by_windows(fetch_from_date, fetch_to_date, class_code)
+
+            json_res = self.behavior_store.sync(self.school.school_id, self.school_year, class_code, from_date,
+                                                to_date, fetch_events)
+            return self._parse_behavior_json(json_res, keep_class, self.behavior_columns)
+        # every window is parsed as soon as it lands, so the transfer of the other windows overlaps the parsing
+        windows = self.split_to_windows(from_date, to_date)
+        windows_reports = self.fetch_concurrently({
+            window: lambda window=window: self._parse_behavior_json(
+                self._fetch_behavior_json(*window, class_code, stream=self.stream_responses), keep_class,
+                self.behavior_columns)
+            for window in windows
+        })
+        # windows with different categories are concatenated as objects, so the schema is applied once more
+        behavior_report_df = pd.concat([windows_reports[window] for window in windows], ignore_index=True)
+        return self.apply_schema(behavior_report_df, self.BEHAVIOR_SCHEMA)
+
+    @classmethod
+    def _parse_behavior_json(cls, json_res: Iterator[dict], keep_class: Callable[[str, int], bool] = None,
+                             columns: Sequence[str] = None) -> pd.DataFrame:
+        columns = cls.BEHAVIOR_COLUMNS if columns is None else columns
+        columns_data = {column: [] for column in columns}
+        extractors = [(cls.BEHAVIOR_EXTRACTORS[column], columns_data[column]) for column in columns]
+        for res_obj in json_res:
+            if keep_class is not None:
+                student_json = res_obj.get('student', {})
+                if not keep_class(student_json.get('classCode', ''), student_json.get('classNum', '')):
+                    continue
+            for extract, values in extractors:
+                values.append(extract(res_obj))
+        behavior_report_df = pd.DataFrame(columns_data, columns=columns)
+        if 'lesson_date' in behavior_report_df:
+            behavior_report_df['lesson_date'] = cls._parse_api_dates(behavior_report_df['lesson_date'], 'Lesson date')
+        return cls.apply_schema(behavior_report_df, cls.BEHAVIOR_SCHEMA)
+
+    def _fetch_behavior_json(self, from_date: date, to_date: date, class_code: str,
+                             stream: bool = False) -> Iterator[dict]:
+        return self._get_json('behave', class_code, from_date, to_date, stream=stream)
+
+    def _fetch_behavior_json_by_windows(self, from_date: date, to_date: date, class_code: str) -> list:
+        windows = self.split_to_windows(from_date, to_date)
+        # the store keeps every event anyway, so each window is read whole by its worker and its connection is freed
+        windows_json = self.fetch_concurrently({
+            window: lambda window=window: self._fetch_behavior_json(*window, class_code) for window in windows
+        })
+        return [event for window in windows for event in windows_json[window]]
 
     def get_students_phonebook(self, class_code: str) -> pd.DataFrame:
         self.assert_logged_in()
 
-        def parse_json_res(details: dict, extra_data: dict) -> list:
-            student_json = details.get('student', {})
-            student_info_json = details.get('studentInfo', {})
-            contacts_list = details.get('contacts', [])
-            parent1_json = contacts_list[0] if len(contacts_list) > 0 else {}
-            parent2_json = contacts_list[1] if len(contacts_list) > 1 else {}
-            student_id = str(student_json.get('studentId', ''))
-            student_extra_data_json = extra_data.get(student_id, {})
-            date_format = '%Y-%m-%dT%H:%M:%S'
-            student_birthdate = student_json.get('birthDate', '')
-            try:
-                student_birthdate = datetime.strptime(student_birthdate, date_format).strftime('%d/%m/%Y')
-            except:
-                if student_birthdate:
-                    msg = f'Warning: Student birthdate format changed! ("{student_birthdate}" instead of {date_format})'
-                    print(msg)
-            required_data = [
-                student_id,
-                student_json.get('familyName', ''),
-                student_json.get('privateName', ''),
-                student_json.get('gender', ''),
-                student_json.get('classCode', ''),
-                student_json.get('classNum', ''),
-                student_birthdate,
-                student_json.get('hebrewBirthDate', ''),
-                student_json.get('major', ''),
-                student_info_json.get('city1', ''),
-                student_info_json.get('address1', ''),
-                student_info_json.get('city2', ''),
-                student_info_json.get('address2', ''),
-                student_info_json.get('phone1', ''),
-                student_info_json.get('email1', ''),
-                student_info_json.get('cellphone1', ''),
-                parent1_json.get('contact', {}).get('contactId', ''),
-                parent1_json.get('contact', {}).get('privateName', ''),
-                parent1_json.get('contactInfo', {}).get('email1', ''),
-                parent1_json.get('contactInfo', {}).get('cellphone1', ''),
-                parent2_json.get('contact', {}).get('contactId', ''),
-                parent2_json.get('contact', {}).get('privateName', ''),
-                parent2_json.get('contactInfo', {}).get('email1', ''),
-                parent2_json.get('contactInfo', {}).get('cellphone1', ''),
-                '',
-                student_extra_data_json.get('NoBro', ''),
-                student_extra_data_json.get('NoCom', ''),
-                student_extra_data_json.get('OrClass', ''),
-                student_extra_data_json.get('OrTeacher', ''),
-                student_extra_data_json.get('rama', ''),
-                student_extra_data_json.get('Sat', ''),
-                '',
-                ''
-            ]
-            return required_data
-
-        if self._phonebook_df is not None:
-            return self._phonebook_df.copy()
-        encoded_class = urllib.parse.quote(class_code)
-        details_url = f'{self.BASE_URL}/api/classes/{encoded_class}/students/details'
-        details_res = self._session.get(details_url, headers={'Referer': self.MAIN_DASHBOARD_PAGE_URL})
-        json_details_res = details_res.json()
-        extra_data_url = f'{self.BASE_URL}/api/classes/{encoded_class}/students/extraData'
-        extra_data_res = self._session.get(extra_data_url, headers={'Referer': self.MAIN_DASHBOARD_PAGE_URL})
-        json_extra_data_res = extra_data_res.json()
-        for _id, det_list in json_extra_data_res.items():
-            new_dict = dict()
-            for el in det_list:
-                if 'columnName' in el:
-                    new_dict[el['columnName']] = el.get('val', '')
-            json_extra_data_res[_id] = new_dict
-        columns = ['student_id', 'family_name', 'private_name', 'gender', 'class_code', 'class_num',
-                   'birthdate', 'heb_birthdate', 'study_trend', 'main_city', 'main_address', 'sec_city', 'sec_address',
-                   'home_phone', 'student_mail', 'student_phone_num', 'parent1_id', 'parent1_name', 'parent1_mail',
-                   'parent1_phone_num', 'parent2_id', 'parent2_name', 'parent2_mail', 'parent2_phone_num',
-                   'edge_means', 'num_brothers', 'num_computers', 'original_class', 'original_teacher', 'level',
-                   'saturday_practitioner', 'material_help', 'home_visits']
-        data = [parse_json_res(v, json_extra_data_res) for v in json_details_res]
-        phonebook_df = pd.DataFrame(data, columns=columns)
-        self._phonebook_df = phonebook_df
-        return phonebook_df
-
-    def get_grades_report(self, from_date: date, to_date: date, class_code: str, exam_type: int) -> pd.DataFrame:
+        def fetch_phonebook() -> pd.DataFrame:
+            json_responses = self.fetch_concurrently({
+                'details': lambda: self._get_json('students/details', class_code),
+                'extra_data': lambda: self._get_json('students/extraData', class_code)
+            })
+            json_details_res = json_responses['details']
+            json_extra_data_res = json_responses['extra_data']
+            for _id, det_list in json_extra_data_res.items():
+                new_dict = dict()
+                for el in det_list:
+                    if 'columnName' in el:
+                        new_dict[el['columnName']] = el.get('val', '')
+                json_extra_data_res[_id] = new_dict
+            extractors = [self.PHONEBOOK_EXTRACTORS[column] for column in self.phonebook_columns]
+            data = []
+            for details in json_details_res:
+                student_id = str(details.get('student', {}).get('studentId', ''))
+                student_extra_data_json = json_extra_data_res.get(student_id, {})
+                data.append([extract(details, student_extra_data_json) for extract in extractors])
+            phonebook_df = pd.DataFrame(data, columns=self.phonebook_columns)
+            if 'birthdate' in phonebook_df:
+                phonebook_df['birthdate'] = pd.to_datetime(phonebook_df['birthdate'], format=self.DATE_FORMAT,
+                                                           errors='coerce')
+            phonebook_df = self.apply_schema(phonebook_df, self.PHONEBOOK_SCHEMA)
+            return phonebook_df.set_index('student_id')
+
+        return self.phonebook_cache.get(self.school.school_id, self.school_year, class_code, self.phonebook_columns,
+                                        fetch_phonebook)
+
+    def get_grades_report(self, from_date: date, to_date: date, class_code: str, exam_type: int,
+                          drop_archives: bool = True, classes_nums: Sequence[int] = None) -> pd.DataFrame:
         self.assert_logged_in()
+        # rows of filtered out classes are skipped while parsing, so they never reach the frame
+        keep_class = self.get_classes_filter(drop_archives, classes_nums)
 
         def parse_semesters_grades_json_res(grades_json: dict) -> pd.DataFrame:
             const_columns = ['school_name', 'student_name', 'class_code', 'class_num', 'level']
             exams_columns = ['end_semester1', 'begin_semester2', 'end_semester2']
             exam_name_to_column_mapper = {name: col for col, name in self.SEMESTER_EXAM_MAPPER.items()}
             phonebook = self.get_students_phonebook(class_code)
-            phonebook['student_id'] = pd.to_numeric(phonebook['student_id'])
-            phonebook.set_index('student_id', inplace=True)
-            phonebook['student_name'] = phonebook['family_name'] + ' ' + phonebook['private_name']
-            phonebook['school_name'] = self.school.name
-            phonebook['level'] = phonebook.apply(
-                lambda row: self.get_class_level(row['class_code'], row['class_num']), axis=1
-            )
-            df = pd.DataFrame(columns=const_columns + exams_columns, index=pd.Index([], name='student_id'))
-            df = df.append(phonebook[const_columns])
+            phonebook_students = pd.DataFrame({
+                'school_name': self.school.name,
+                'student_name': phonebook['family_name'] + ' ' + phonebook['private_name'],
+                'class_code': phonebook['class_code'],
+                'class_num': phonebook['class_num'],
+                'level': self.map_classes_levels(phonebook['class_code'], phonebook['class_num'])
+            }, index=phonebook.index)
+            if keep_class is not None:
+                phonebook_students = phonebook_students.loc[[
+                    keep_class(*class_key) for class_key in zip(phonebook['class_code'], phonebook['class_num'])]]
+            exams_grades = []
             for grade in grades_json:
-                exam_type = grade.get('gradeType', {}).get('name', '')
-                if exam_type == self.EXAM_TYPE_WORD:
-                    exam_name = grade.get('gradingEvent', {}).get('name', '')
-                    exam_column = exam_name_to_column_mapper.get(exam_name)
-                    if exam_column:
-                        student_json = grade.get('student', {})
-                        student_id = student_json.get('studentId', np.NaN)
-                        if student_id and student_id not in df.index:
-                            family_name = student_json.get('familyName', '')
-                            private_name = student_json.get('privateName', '')
-                            student_class_code = student_json.get('classCode', '')
-                            student_class_num = student_json.get('classNum', '')
-                            new_student_data = {
-                                'student_name': f"{family_name} {private_name}",
-                                'class_code': student_class_code,
-                                'class_num': student_class_num,
-                                'school_name': self.school.name,
-                                'level': self.get_class_level(student_class_code, student_class_num)
-                            }
-                            df = df.append(pd.DataFrame(new_student_data, index=[student_id]))
-                        df.loc[student_id, exam_column] = grade.get('grade', {}).get('grade', np.NaN)
-            df.replace('', np.NaN, inplace=True)
+                if grade.get('gradeType', {}).get('name', '') != self.EXAM_TYPE_WORD:
+                    continue
+                exam_column = exam_name_to_column_mapper.get(grade.get('gradingEvent', {}).get('name', ''))
+                student_json = grade.get('student', {})
+                student_id = student_json.get('studentId')
+                if exam_column and student_id:
+                    exams_grades.append([
+                        student_id,
+                        exam_column,
+                        grade.get('grade', {}).get('grade', np.nan),
+                        f"{student_json.get('familyName', '')} {student_json.get('privateName', '')}",
+                        student_json.get('classCode', ''),
+                        student_json.get('classNum', '')
+                    ])
+            exams_grades_df = pd.DataFrame(exams_grades, columns=['student_id', 'exam_column', 'grade', 'student_name',
+                                                                  'class_code', 'class_num'])
+            # students who have grades but are missing from the phonebook are taken from their first grade
+            new_students = exams_grades_df.drop_duplicates('student_id', keep='first')
+            new_students = new_students.loc[~new_students['student_id'].isin(phonebook.index)]
+            if keep_class is not None:
+                new_students = new_students.loc[[
+                    keep_class(*class_key) for class_key in zip(new_students['class_code'], new_students['class_num'])]]
+            new_students = new_students.set_index('student_id')[['student_name', 'class_code', 'class_num']]
+            new_students['school_name'] = self.school.name
+            new_students['level'] = self.map_classes_levels(new_students['class_code'], new_students['class_num'])
+            # a later grade of the same exam overrides an earlier one
+            exams_table = exams_grades_df.drop_duplicates(['student_id', 'exam_column'], keep='last')
+            exams_table = exams_table.set_index(['student_id', 'exam_column'])['grade'].unstack('exam_column')
+            df = pd.concat([phonebook_students[const_columns], new_students[const_columns]])
+            df = df.join(exams_table.reindex(columns=exams_columns))
+            df.index.name = 'student_id'
+            df.replace('', np.nan, inplace=True)
             df.sort_index(inplace=True)
-            df.rename(columns={df.index.name: 'student_id'}, inplace=True)
-            no_archives_filter = df['level'] != self.ClassLevel.ARCHIVES
-            df = df.loc[no_archives_filter]
-            return df
+            return self.apply_schema(df, self.SEMESTER_GRADES_SCHEMA)
 
         def parse_all_grades_json_res(grades_json: dict) -> pd.DataFrame:
             const_columns = ['school_name', 'student_id', 'student_name', 'class_code', 'class_num', 'level',
                              'exam_date', 'exam_grade', 'exam_type', 'exam_name', 'exam_subject']
-            df = pd.DataFrame(columns=const_columns)
+            columns_data = {column: [] for column in const_columns if column not in ('school_name', 'level')}
+            students_ids, students_names, classes_codes, classes_nums, exams_dates, exams_grades, exams_types, \
+                exams_names, exams_subjects = columns_data.values()
             for grade in grades_json:
-                current_exam_type = grade.get('gradeType', {}).get('name', '')
-                exam_date = grade.get('gradingEvent', {}).get('eDate', '')
-                date_format = '%Y-%m-%dT%H:%M:%S'
-                try:
-                    exam_date = datetime.strptime(exam_date, date_format).strftime('%d/%m/%Y')
-                except:
-                    if exam_date:
-                        print(f'Warning: Exam date format changed! ("{exam_date}" instead of {date_format})')
                 student_json = grade.get('student', {})
-                student_id = student_json.get('studentId', pd.NA)
-                family_name = student_json.get('familyName', '')
-                private_name = student_json.get('privateName', '')
-                student_class_code = student_json.get('classCode', '')
-                student_class_num = student_json.get('classNum', '')
-                exam_grade = grade.get('grade', {}).get('grade', pd.NA)
-                exam_name = grade.get('gradingEvent', {}).get('name', pd.NA)
-                exam_subject = grade.get('group', {}).get('subjectName', pd.NA)
-                new_grade_data = {
-                    'school_name': self.school.name,
-                    'student_id': student_id,
-                    'student_name': f"{family_name} {private_name}",
-                    'class_code': student_class_code,
-                    'class_num': student_class_num,
-                    'level': self.get_class_level(student_class_code, student_class_num),
-                    'exam_date': exam_date,
-                    'exam_grade': exam_grade,
-                    'exam_type': current_exam_type,
-                    'exam_name': exam_name,
-                    'exam_subject': exam_subject
-                }
-                df = df.append(new_grade_data, ignore_index=True)
+                if keep_class is not None and not keep_class(student_json.get('classCode', ''),
+                                                             student_json.get('classNum', '')):
+                    continue
+                grading_event_json = grade.get('gradingEvent', {})
+                students_ids.append(student_json.get('studentId', pd.NA))
+                students_names.append(f'{student_json.get("familyName", "")} {student_json.get("privateName", "")}')
+                classes_codes.append(student_json.get('classCode', ''))
+                classes_nums.append(student_json.get('classNum', ''))
+                exams_dates.append(grading_event_json.get('eDate', ''))
+                exams_grades.append(grade.get('grade', {}).get('grade', pd.NA))
+                exams_types.append(grade.get('gradeType', {}).get('name', ''))
+                exams_names.append(grading_event_json.get('name', pd.NA))
+                exams_subjects.append(grade.get('group', {}).get('subjectName', pd.NA))
+            df = pd.DataFrame(columns_data)
+            df['school_name'] = self.school.name
+            df['level'] = self.map_classes_levels(df['class_code'], df['class_num'])
+            df = df[const_columns]
             df.replace('', pd.NA, inplace=True)
-            no_archives_filter = df['level'] != self.ClassLevel.ARCHIVES
-            df = df.loc[no_archives_filter]
-            df.reset_index(inplace=True, drop=True)
-            df['exam_date'] = pd.to_datetime(df['exam_date'], format='%d/%m/%Y')
-            return df
+            df['exam_date'] = self._parse_api_dates(df['exam_date'], 'Exam date')
+            return self.apply_schema(df, self.ALL_GRADES_SCHEMA)
 
         parser_mapper = {
             self.ExamType.SEMESTER_EXAM: parse_semesters_grades_json_res,
             self.ExamType.ALL: parse_all_grades_json_res
         }
 
-        encoded_class = urllib.parse.quote(class_code)
-        from_date = f"{from_date.strftime('%Y-%m-%d')}T00:00:00Z"
-        to_date = f"{to_date.strftime('%Y-%m-%d')}T23:59:59Z"
-        grades_url = f'{self.BASE_URL}/api/classes/{encoded_class}/grades?start={from_date}&end={to_date}'
-        grades_res = self._session.get(grades_url, headers={'Referer': self.MAIN_DASHBOARD_PAGE_URL})
-        json_grades_res = grades_res.json()
+        grades_dataset = self.get_grades_dataset(class_code)
+        if grades_dataset.covers(from_date, to_date):
+            json_grades_res = grades_dataset.get_grades(from_date, to_date)
+        else:
+            json_grades_res = self._fetch_grades_json(from_date, to_date, class_code, stream=self.stream_responses)
         grades_df = parser_mapper[exam_type](json_grades_res)
         return grades_df
 
+    def _fetch_grades_json(self, from_date: date, to_date: date, class_code: str,
+                           stream: bool = False) -> Iterator[dict]:
+        return self._get_json('grades', class_code, from_date, to_date, stream=stream)
+
+    def get_grades_dataset(self, class_code: str) -> GradesDataset:
+        # the whole school year is downloaded once, every grades view of a sub-range is derived from it
+        with self._grades_lock:
+            if class_code not in self._grades_datasets:
+                from_date, to_date = self.get_school_year_dates(self.school_year)
+                # the dataset keeps every grade of the year, so its response is not streamed
+                grades_json = self._fetch_grades_json(from_date, to_date, class_code)
+                self._grades_datasets[class_code] = GradesDataset(from_date, to_date, grades_json)
+            return self._grades_datasets[class_code]
+
     def get_classes_details(self):
         self.assert_logged_in()
-        classes_url = f'{self.BASE_URL}/api/classes'
-        classes_res = self._session.get(classes_url, headers={'Referer': self.MAIN_DASHBOARD_PAGE_URL})
-        json_classes_res = classes_res.json()
+        json_classes_res = self._get_json('classes')
         for json_class in json_classes_res:
             class_code = json_class.get('classCode')
             class_num = json_class.get('classNum')
             class_name_attr = json_class.get('className', '')
-            level_regex_pattern = re.compile(r'(?P<practitioner>[א-ת ]+?) *- *(?P<level>.?\d.? יח\"?ל)')
-            regex_search_res = level_regex_pattern.search(class_name_attr)
+            regex_search_res = self.CLASS_NAME_REGEX.search(class_name_attr)
             if regex_search_res:
                 practitioner = regex_search_res.group('practitioner')
                 level = regex_search_res.group('level')
@@ -506,45 +1469,48 @@ class MashovServer:
                 practitioner = class_name_attr
                 level = self.ClassLevel.NO_LEVEL
             cur_class = Class(class_code=class_code, class_num=class_num, practitioner=practitioner, level=level)
-            if class_code not in self.classes_details.keys():
-                self.classes_details[class_code] = dict()
-            self.classes_details[class_code][class_num] = cur_class
-        for class_code, class_numbers_dict in self.classes_details.items():
-            archives_class_num = max(class_numbers_dict.keys())
-            class_numbers_dict[archives_class_num].practitioner = ''
-            class_numbers_dict[archives_class_num].level = self.ClassLevel.ARCHIVES
-
-    def _get_class_details(self, class_code: str, class_num: int) -> Class:
+            self.classes_details.setdefault(class_code, dict())[class_num] = cur_class
+        self.classes_index = ClassesIndex(self.classes_details, self.ClassLevel.NO_LEVEL, self.ClassLevel.ARCHIVES)
+        for class_code, archives_class_num in self.classes_index.archives_classes_nums.items():
+            archives_class = self.classes_details[class_code][archives_class_num]
+            archives_class.practitioner = self.classes_index.practitioners[(class_code, archives_class_num)]
+            archives_class.level = self.classes_index.levels[(class_code, archives_class_num)]
+
+    def map_classes_levels(self, classes_codes, classes_nums) -> np.ndarray:
         self.assert_logged_in()
-        assert type(class_code) == str, 'שכבה חייבת להיות מחרוזת!'
-        assert type(class_num) == int, 'כיתה חייבת להיות מספר!'
-        return self.classes_details.get(class_code, {}).get(class_num, None)
+        return self.classes_index.map_levels(classes_codes, classes_nums)
+
+    def map_classes_practitioners(self, classes_codes, classes_nums) -> np.ndarray:
+        self.assert_logged_in()
+        return self.classes_index.map_practitioners(classes_codes, classes_nums)
 
     def get_class_level(self, class_code: str, class_num: int) -> str:
-        class_details = self._get_class_details(class_code, class_num)
-        if class_details is None:
-            return self.ClassLevel.NO_LEVEL
-        return class_details.level
+        self.assert_logged_in()
+        return self.classes_index.levels.get((class_code, class_num), self.ClassLevel.NO_LEVEL)
 
     def get_class_practitioner(self, class_code: str, class_num: int) -> str:
-        class_details = self._get_class_details(class_code, class_num)
-        if class_details is None:
-            return ''
-        return class_details.practitioner
-
-    def get_organic_teacher_name(self, class_code: str, class_num: int) -> str:
-        phonebook_df = self.get_students_phonebook(class_code)
-        if phonebook_df.empty:
-            return ''
-        class_code_filter = phonebook_df['class_code'] == class_code
-        class_num_filter = phonebook_df['class_num'] == class_num
-        teachers_df = phonebook_df.loc[class_code_filter & class_num_filter, 'original_teacher']
-        if teachers_df.empty:
-            return ''
-        return str(teachers_df.mode().head(1).item())
+        self.assert_logged_in()
+        return self.classes_index.practitioners.get((class_code, class_num), '')
+
+    def get_classes_roster(self, class_code: str) -> pd.DataFrame:
+        # the roster ends with the archives class, right after the last active class
+        classes_nums = pd.Index(range(1, self.get_num_of_active_classes(class_code) + 2), name='class_num')
+        phonebook_df = self.get_students_phonebook(class_code).reset_index()
+        num_of_students = phonebook_df.groupby('class_num')['student_id'].nunique()
+        class_code_students = phonebook_df.loc[phonebook_df['class_code'] == class_code]
+        teachers_counts = class_code_students.groupby(['class_num', 'original_teacher'], observed=True).size()
+        teachers_counts = teachers_counts.reset_index(name='num_of_students')
+        # the organic teacher is the class' most common one, ties go to the first by order like in Series.mode
+        teachers_counts.sort_values(['class_num', 'num_of_students', 'original_teacher'],
+                                    ascending=[True, False, True], inplace=True)
+        organic_teachers = teachers_counts.drop_duplicates('class_num').set_index('class_num')['original_teacher']
+        classes_codes = [class_code] * len(classes_nums)
+        return pd.DataFrame({
+            'organic_teacher': organic_teachers.reindex(classes_nums).astype(object).fillna('').astype(str),
+            'num_of_students': num_of_students.reindex(classes_nums, fill_value=0),
+            'practitioner': self.map_classes_practitioners(classes_codes, classes_nums),
+            'level': self.map_classes_levels(classes_codes, classes_nums)
+        }, index=classes_nums)
 
     def get_num_of_active_classes(self, class_code: str):
-        class_details = self.classes_details.get(class_code, {})
-        if not class_details:
-            return 0
-        return max(class_details.keys()) - 1  # highest class is archives, not active
+        return self.classes_index.num_of_active_classes.get(class_code, 0)
@@ -1,4 +1,5 @@
 from reports_maker import ReportMaker
+from data_server import BehaviorEventStore
 from typing import Sequence
 from datetime import date
 import pandas as pd
@@ -195,7 +196,12 @@ class MashovReportsToExcel:
     DESTINATION_FOLDER_NAME = 'דוחות משוב'
 
     def __init__(self, heb_year: str, class_codes: Sequence[str], username: str, password: str,
-                 destination_folder_path: str, from_date: date = None, to_date: date = None):
+                 destination_folder_path: str, from_date: date = None, to_date: date = None,
+                 max_concurrent_schools: int = ReportMaker.DEFAULT_MAX_CONCURRENT_SCHOOLS,
+                 incremental_behavior: bool = True,
+                 behavior_lookback_days: int = BehaviorEventStore.DEFAULT_LOOKBACK_DAYS,
+                 stream_responses: bool = False, behavior_columns: Sequence[str] = None,
+                 phonebook_columns: Sequence[str] = ReportMaker.REPORT_PHONEBOOK_COLUMNS):
         self.class_codes = class_codes
         self.heb_year = heb_year
         self.destination_folder_path = os.path.join(destination_folder_path, self.DESTINATION_FOLDER_NAME)
@@ -207,7 +213,12 @@ class MashovReportsToExcel:
         os.makedirs(self.destination_folder_path)
         self.report_makers_for_class = dict()
         for class_code in self.class_codes:
-            report_maker = ReportMaker(self.SCHOOLS, heb_year, class_code, username, password)
+            report_maker = ReportMaker(self.SCHOOLS, heb_year, class_code, username, password,
+                                       max_concurrent_schools=max_concurrent_schools,
+                                       incremental_behavior=incremental_behavior,
+                                       behavior_lookback_days=behavior_lookback_days,
+                                       stream_responses=stream_responses,
+                                       behavior_columns=behavior_columns, phonebook_columns=phonebook_columns)
             if not from_date:
                 from_date = report_maker.first_school_year_date
             if not to_date:
@@ -1,7 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
-from data_server import MashovServer, School
+from data_server import BehaviorEventStore, MashovServer, PhonebookCache, School
 from dateutil import relativedelta
-from typing import Dict, Sequence
+from typing import Dict, List, Sequence, Tuple
 import pandas as pd
 import calendar
 import re
@@ -26,8 +27,6 @@ class SchoolData(School):
     def __init__(self, school_id: int, name: str, class_code: str):
         super().__init__(school_id, name)
         self.class_code = class_code
-        self._behavior_report = None
-        self._raw_behavior_report = None
         self._phonebook = None
         self._semesters_grades_report = None
         self._all_grades_report = None
@@ -39,22 +38,6 @@ class SchoolData(School):
         self._num_of_students: Dict[int, int] = dict()
         self._num_of_active_classes = 0
 
-    @property
-    def behavior_report(self) -> pd.DataFrame:
-        return self._behavior_report
-
-    @behavior_report.setter
-    def behavior_report(self, behavior_report: pd.DataFrame) -> None:
-        self._behavior_report = behavior_report
-
-    @property
-    def raw_behavior_report(self) -> pd.DataFrame:
-        return self._raw_behavior_report
-
-    @raw_behavior_report.setter
-    def raw_behavior_report(self, raw_behavior_report: pd.DataFrame) -> None:
-        self._raw_behavior_report = raw_behavior_report
-
     @property
     def phonebook(self) -> pd.DataFrame:
         return self._phonebook
@@ -129,6 +112,22 @@ class SchoolData(School):
     def get_num_of_students(self, class_num: int) -> int:
         return self._num_of_students.get(class_num, 0)
 
+    def map_organic_teachers(self, classes_nums: pd.Series) -> pd.Series:
+        return classes_nums.map(self._organic_teachers).fillna('')
+
+    def map_practitioners(self, classes_nums: pd.Series) -> pd.Series:
+        return classes_nums.map(self._practitioners).fillna('')
+
+    def map_levels(self, classes_nums: pd.Series) -> pd.Series:
+        return classes_nums.map(self._levels).fillna('')
+
+    def set_classes_roster(self, classes_roster: pd.DataFrame) -> None:
+        active_classes_roster = classes_roster.loc[classes_roster.index <= self.num_of_active_classes]
+        self._organic_teachers.update(active_classes_roster['organic_teacher'].to_dict())
+        self._practitioners.update(active_classes_roster['practitioner'].to_dict())
+        self._num_of_students.update(active_classes_roster['num_of_students'].to_dict())
+        self._levels.update(classes_roster['level'].to_dict())
+
     def get_num_of_students_in_school(self) -> int:
         return sum([self.get_num_of_students(class_num) for class_num in range(1, self.num_of_active_classes + 1)])
 
@@ -178,6 +177,20 @@ class ReportMaker:
         'green': f'ירוק (מעל {GREEN_GRADE_THRESHOLD})'
     }
     DATE_FORMAT = '%d/%m/%Y'
+    DEFAULT_MAX_CONCURRENT_SCHOOLS = 4
+    # calculate_most_common_event_type and the presence reports read these, whatever other columns were asked for
+    BEHAVIOR_REQUIRED_COLUMNS = ['lesson_date', 'lesson_num', 'student_id', 'class_num', 'event_type']
+    # the reports read only the phonebook columns every server extracts, the rest are left out by default
+    REPORT_PHONEBOOK_COLUMNS = list(MashovServer.PHONEBOOK_REQUIRED_COLUMNS)
+    # the fact table adds these to the behavior columns, event_type is after calculate_most_common_event_type
+    BEHAVIOR_FACTS_SCHEMA = {
+        'raw_event_type': 'category',
+        'school_id': 'int64',
+        'school_name': 'category',
+        'level': 'category',
+        'practitioner': 'category',
+        'is_archive': 'bool'
+    }
 
     @staticmethod
     def sort_datetime_columns_names(df: pd.DataFrame, non_datetime_names: Sequence, datetime_format: str):
@@ -215,38 +228,61 @@ class ReportMaker:
 
     @staticmethod
     def calculate_most_common_event_type(behavior_report: pd.DataFrame) -> pd.DataFrame:
-        def calculate_event(group_df: pd.DataFrame) -> str:
-            event_type_series = group_df['event_type']
-            if event_type_series.empty:
-                return ''
-            most_common_values = event_type_series.mode()
-            if len(most_common_values) > 1 and ReportMaker.LessonEvents.PRESENCE in most_common_values.tolist():
-                return ReportMaker.LessonEvents.PRESENCE
-            else:
-                return most_common_values.head(1).item()
-
-        groups = behavior_report.groupby(['lesson_date', 'class_num', 'student_id'])
-        for idx in groups.groups.keys():
-            group = groups.get_group(idx)
-            if len(group) > 1:
-                lesson_date, class_num, student_id = idx
-                date_filter = behavior_report['lesson_date'] == lesson_date
-                class_filter = behavior_report['class_num'] == class_num
-                id_filter = behavior_report['student_id'] == student_id
-                event = calculate_event(group)
-                if event == ReportMaker.LessonEvents.PRESENCE:
-                    missing_filter = behavior_report['event_type'] == ReportMaker.LessonEvents.MISSING
-                    online_missing = behavior_report['event_type'] == ReportMaker.LessonEvents.ONLINE_MISSING
-                    event_filter = missing_filter | online_missing
-                elif event in (ReportMaker.LessonEvents.MISSING, ReportMaker.LessonEvents.ONLINE_MISSING):
-                    event_filter = behavior_report['event_type'] == ReportMaker.LessonEvents.PRESENCE
-                else:
-                    event_filter = None
-                if event_filter is not None:
-                    behavior_report.loc[date_filter & class_filter & id_filter & event_filter, 'event_type'] = event
+        missing_events = [ReportMaker.LessonEvents.MISSING, ReportMaker.LessonEvents.ONLINE_MISSING]
+        # every student's lesson gets a number, so its event types are counted once and mapped back by that number
+        lessons_ids = behavior_report.groupby(['lesson_date', 'class_num', 'student_id']).ngroup()
+        lessons_events = pd.DataFrame({'lesson_id': lessons_ids, 'event_type': behavior_report['event_type']})
+        # rows with a missing key get -1 and belong to no lesson, like groupby drops them
+        lessons_events = lessons_events.loc[lessons_ids >= 0]
+        events_counts = lessons_events.groupby(['lesson_id', 'event_type'], observed=True).size()
+        events_counts = events_counts.reset_index(name='count')
+        lesson_groups = events_counts.groupby('lesson_id')['count']
+        lesson_size = lesson_groups.transform('sum')
+        modes = events_counts.loc[(lesson_size > 1) & (events_counts['count'] == lesson_groups.transform('max'))]
+        # presence wins a tie, otherwise the first mode by the order Series.mode sorts them does
+        modes = modes.assign(is_presence=modes['event_type'] == ReportMaker.LessonEvents.PRESENCE)
+        modes = modes.sort_values(['is_presence', 'event_type'], ascending=[False, True], kind='mergesort')
+        modes = modes.drop_duplicates('lesson_id')
+        lesson_events = modes.set_index('lesson_id')['event_type'].astype(object).reindex(lessons_ids).to_numpy()
+        event_type = behavior_report['event_type']
+        to_presence = (lesson_events == ReportMaker.LessonEvents.PRESENCE) & event_type.isin(missing_events).to_numpy()
+        to_missing = pd.Series(lesson_events).isin(missing_events).to_numpy() & (
+            event_type == ReportMaker.LessonEvents.PRESENCE).to_numpy()
+        # a categorical column can't be set to a value out of its categories, even through an empty selection
+        if to_presence.any():
+            behavior_report.loc[to_presence, 'event_type'] = ReportMaker.LessonEvents.PRESENCE
+        if to_missing.any():
+            behavior_report.loc[to_missing, 'event_type'] = lesson_events[to_missing]
         return behavior_report
 
-    def __init__(self, schools_ids: list, heb_year: str, class_code: str, username: str, password: str):
+    @staticmethod
+    def count_students_by_events(behavior_report: pd.DataFrame, keys: Sequence[str],
+                                 events_types: Sequence[str]) -> pd.DataFrame:
+        # the distinct students of every group and event type come out of a single groupby, one column per event
+        events_filter = behavior_report['event_type'].isin(events_types)
+        students_counts = behavior_report.loc[events_filter].groupby(list(keys) + ['event_type'], observed=True)
+        students_counts = students_counts['student_id'].nunique().unstack('event_type', fill_value=0)
+        # groups without any of the events are counted as zeros
+        groups_index = behavior_report.groupby(list(keys), observed=True).size().index
+        return students_counts.reindex(index=groups_index, columns=events_types, fill_value=0)
+
+    def __init__(self, schools_ids: list, heb_year: str, class_code: str, username: str, password: str,
+                 max_concurrent_schools: int = DEFAULT_MAX_CONCURRENT_SCHOOLS, incremental_behavior: bool = True,
+                 behavior_lookback_days: int = BehaviorEventStore.DEFAULT_LOOKBACK_DAYS,
+                 behavior_window_months: int = MashovServer.DEFAULT_BEHAVIOR_WINDOW_MONTHS,
+                 stream_responses: bool = False, behavior_columns: Sequence[str] = None,
+                 phonebook_columns: Sequence[str] = None):
+        if max_concurrent_schools < 1:
+            raise ValueError(f'מספר בתי הספר המקבילי חייב להיות לפחות 1, לא {max_concurrent_schools}')
+        self.max_concurrent_schools = max_concurrent_schools
+        self.behavior_window_months = behavior_window_months
+        self.stream_responses = stream_responses
+        self.behavior_columns = MashovServer.select_columns(behavior_columns, MashovServer.BEHAVIOR_COLUMNS,
+                                                            self.BEHAVIOR_REQUIRED_COLUMNS)
+        self.phonebook_columns = MashovServer.select_columns(phonebook_columns, MashovServer.PHONEBOOK_COLUMNS,
+                                                             self.REPORT_PHONEBOOK_COLUMNS)
+        self.phonebook_cache = PhonebookCache()
+        self.behavior_store = BehaviorEventStore(lookback_days=behavior_lookback_days) if incremental_behavior else None
         self.schools_data: Dict[int, SchoolData] = {_id: None for _id in schools_ids}
         self.heb_year = heb_year
         self.class_code = class_code
@@ -255,10 +291,10 @@ class ReportMaker:
         self.from_date = None
         self.to_date = None
         self._greg_year = MashovServer.map_heb_year_to_greg(self.heb_year)
-        self._first_school_year_date = date(year=self._greg_year - 1, month=8, day=1)
-        self._last_school_year_date = date(year=self._greg_year, month=11, day=30)
+        self._first_school_year_date, self._last_school_year_date = MashovServer.get_school_year_dates(self._greg_year)
         self._previous_heb_year = MashovServer.map_greg_year_to_heb(self._greg_year - 1)
         self._school_name_to_id_mapper = dict()
+        self.behavior_facts: pd.DataFrame = None
 
     @property
     def first_school_year_date(self) -> date:
@@ -277,82 +313,131 @@ class ReportMaker:
             from_date = to_date + relativedelta.relativedelta(months=-1)
         self.from_date = from_date
         self.to_date = to_date
-        for school_id in self.schools_data.keys():
-            server = MashovServer(school_id=school_id, school_year=self.heb_year)
+        schools_ids = list(self.schools_data.keys())
+        num_of_workers = max(1, min(self.max_concurrent_schools, len(schools_ids)))
+        with ThreadPoolExecutor(max_workers=num_of_workers) as executor:
+            futures = [executor.submit(self._fetch_school_data, school_id, from_date, to_date)
+                       for school_id in schools_ids]
             try:
-                server.login(username=self.username, password=self.password)
-                behavior_report = server.get_behavior_report_by_dates(from_date=from_date,
-                                                                      to_date=to_date,
-                                                                      class_code=self.class_code)
-                raw_behavior_report = behavior_report.copy()
-                phonebook = server.get_students_phonebook(class_code=self.class_code)
-                semesters_grades_report = server.get_grades_report(from_date=from_date,
-                                                                   to_date=to_date,
-                                                                   class_code=self.class_code,
-                                                                   exam_type=MashovServer.ExamType.SEMESTER_EXAM)
-                all_grades_report = server.get_grades_report(from_date=from_date,
-                                                             to_date=to_date,
-                                                             class_code=self.class_code,
-                                                             exam_type=MashovServer.ExamType.ALL)
-                current_year_grades_df = server.get_grades_report(from_date=self._first_school_year_date,
-                                                                  to_date=self._last_school_year_date,
-                                                                  class_code=self.class_code,
-                                                                  exam_type=MashovServer.ExamType.SEMESTER_EXAM)
-                try:
-                    # "school_year=self._previous_heb_year" will raise an exception if there is no prev year
-                    prev_year_server = MashovServer(school_id=school_id, school_year=self._previous_heb_year)
-                    prev_greg_year = self._greg_year - 1
-                    prev_from_date = self._first_school_year_date.replace(year=prev_greg_year - 1)
-                    prev_to_date = self._last_school_year_date.replace(year=prev_greg_year)
-                    prev_class_code = self.get_previous_class_code(self.class_code)
-                    prev_year_server.login(username=self.username, password=self.password)
-                    prev_year_grades_df = prev_year_server.get_grades_report(
-                        from_date=prev_from_date,
-                        to_date=prev_to_date,
-                        class_code=prev_class_code,
-                        exam_type=MashovServer.ExamType.SEMESTER_EXAM)
-                except TypeError:  # there are no data of previous year in the server
-                    prev_year_grades_df = None
-                school_class_data = SchoolData(school_id, server.school.name, self.class_code)
-                school_class_data.behavior_report = self.calculate_most_common_event_type(behavior_report)
-                school_class_data.raw_behavior_report = raw_behavior_report
-                school_class_data.phonebook = phonebook
-                school_class_data.semesters_grades_report = semesters_grades_report
-                school_class_data.all_grades_report = all_grades_report
-                school_class_data.num_of_active_classes = server.get_num_of_active_classes(self.class_code)
-                school_class_data.year_grades = current_year_grades_df
-                school_class_data.prev_year_grades = prev_year_grades_df
-                for class_num in range(1, school_class_data.num_of_active_classes + 1):
-                    organic_teacher_name = server.get_organic_teacher_name(self.class_code, class_num)
-                    practitioner_name = server.get_class_practitioner(self.class_code, class_num)
-                    class_level = server.get_class_level(self.class_code, class_num)
-                    school_class_data.set_organic_teacher(class_num, organic_teacher_name)
-                    school_class_data.set_practitioner(class_num, practitioner_name)
-                    school_class_data.set_level(class_num, class_level)
-                archives_class_num = school_class_data.num_of_active_classes + 1
-                archives_class_level = server.get_class_level(self.class_code, archives_class_num)
-                school_class_data.set_level(archives_class_num, archives_class_level)
-                self.schools_data[school_id] = school_class_data
-                self._school_name_to_id_mapper[school_class_data.name] = school_id
+                # collect in the original schools order, so the first failing school (by order) is raised
+                schools_results = [future.result() for future in futures]
             except Exception:
+                for future in futures:
+                    future.cancel()
                 raise
-            finally:
-                server.logout()
-        self.calculate_num_of_students()
+        for school_id, (school_class_data, _) in zip(schools_ids, schools_results):
+            self.schools_data[school_id] = school_class_data
+            self._school_name_to_id_mapper[school_class_data.name] = school_id
+        self.behavior_facts = self._build_behavior_facts([school_facts for _, school_facts in schools_results])
 
-    def calculate_num_of_students(self):
-        for school_id, school_data in self.schools_data.items():
-            for class_num in range(1, school_data.num_of_active_classes + 1):
-                class_num_filter = school_data.phonebook['class_num'] == class_num
-                class_num_students = school_data.phonebook.loc[class_num_filter, 'student_id']
-                school_data.set_num_of_students(class_num, class_num_students.nunique())
+    @staticmethod
+    def _build_school_behavior_facts(school_data: SchoolData, behavior_report: pd.DataFrame) -> pd.DataFrame:
+        raw_event_types = behavior_report['event_type'].copy()
+        behavior_report = ReportMaker.calculate_most_common_event_type(behavior_report)
+        levels = school_data.map_levels(behavior_report['class_num'])
+        return behavior_report.assign(
+            raw_event_type=raw_event_types,
+            school_id=school_data.school_id,
+            school_name=school_data.name,
+            level=levels,
+            practitioner=school_data.map_practitioners(behavior_report['class_num']),
+            is_archive=levels == MashovServer.ClassLevel.ARCHIVES
+        )
+
+    def _build_behavior_facts(self, schools_facts: List[pd.DataFrame]) -> pd.DataFrame:
+        if schools_facts:
+            # the schools' categories differ, so the concatenated columns are objects until they are typed again
+            behavior_facts = pd.concat(schools_facts, ignore_index=True)
+        else:
+            behavior_facts = pd.DataFrame(columns=self.behavior_columns + list(self.BEHAVIOR_FACTS_SCHEMA))
+        return MashovServer.apply_schema(behavior_facts, {**MashovServer.BEHAVIOR_SCHEMA, **self.BEHAVIOR_FACTS_SCHEMA})
+
+    def get_behavior_facts(self, from_date: pd.Timestamp, to_date: pd.Timestamp,
+                           drop_archives: bool = True) -> pd.DataFrame:
+        lessons_dates = self.behavior_facts['lesson_date']
+        period_filter = (lessons_dates >= from_date) & (lessons_dates <= to_date)
+        if drop_archives:
+            period_filter &= ~self.behavior_facts['is_archive']
+        return self.behavior_facts.loc[period_filter]
+
+    def get_school_behavior_report(self, school_id: int, raw_event_types: bool = False) -> pd.DataFrame:
+        # a school's rows of the fact table, in the behavior columns the server returned
+        school_facts = self.behavior_facts.loc[self.behavior_facts['school_id'] == school_id]
+        behavior_report = school_facts[self.behavior_columns]
+        if raw_event_types:
+            behavior_report = behavior_report.assign(event_type=school_facts['raw_event_type'])
+        return behavior_report
+
+    def _fetch_school_data(self, school_id: int, from_date: date, to_date: date) -> Tuple[SchoolData, pd.DataFrame]:
+        server = MashovServer(school_id=school_id, school_year=self.heb_year, behavior_store=self.behavior_store,
+                              behavior_window_months=self.behavior_window_months,
+                              stream_responses=self.stream_responses, phonebook_cache=self.phonebook_cache,
+                              behavior_columns=self.behavior_columns, phonebook_columns=self.phonebook_columns)
+        try:
+            server.login(username=self.username, password=self.password)
+            school_reports = server.fetch_concurrently({
+                'behavior_report': lambda: server.get_behavior_report_by_dates(from_date=from_date,
+                                                                               to_date=to_date,
+                                                                               class_code=self.class_code),
+                'phonebook': lambda: server.get_students_phonebook(class_code=self.class_code),
+                'semesters_grades_report': lambda: server.get_grades_report(
+                    from_date=from_date,
+                    to_date=to_date,
+                    class_code=self.class_code,
+                    exam_type=MashovServer.ExamType.SEMESTER_EXAM),
+                'all_grades_report': lambda: server.get_grades_report(from_date=from_date,
+                                                                      to_date=to_date,
+                                                                      class_code=self.class_code,
+                                                                      exam_type=MashovServer.ExamType.ALL),
+                'current_year_grades': lambda: server.get_grades_report(
+                    from_date=self._first_school_year_date,
+                    to_date=self._last_school_year_date,
+                    class_code=self.class_code,
+                    exam_type=MashovServer.ExamType.SEMESTER_EXAM)
+            })
+            behavior_report = school_reports['behavior_report']
+            phonebook = school_reports['phonebook']
+            semesters_grades_report = school_reports['semesters_grades_report']
+            all_grades_report = school_reports['all_grades_report']
+            current_year_grades_df = school_reports['current_year_grades']
+            try:
+                # "school_year=self._previous_heb_year" will raise an exception if there is no prev year
+                prev_year_server = MashovServer(school_id=school_id, school_year=self._previous_heb_year,
+                                                phonebook_cache=self.phonebook_cache,
+                                                phonebook_columns=self.phonebook_columns)
+                prev_greg_year = self._greg_year - 1
+                prev_from_date, prev_to_date = MashovServer.get_school_year_dates(prev_greg_year)
+                prev_class_code = self.get_previous_class_code(self.class_code)
+                prev_year_server.login(username=self.username, password=self.password)
+                prev_year_grades_df = prev_year_server.get_grades_report(
+                    from_date=prev_from_date,
+                    to_date=prev_to_date,
+                    class_code=prev_class_code,
+                    exam_type=MashovServer.ExamType.SEMESTER_EXAM)
+            except TypeError:  # there are no data of previous year in the server
+                prev_year_grades_df = None
+            school_class_data = SchoolData(school_id, server.school.name, self.class_code)
+            school_class_data.phonebook = phonebook
+            school_class_data.semesters_grades_report = semesters_grades_report
+            school_class_data.all_grades_report = all_grades_report
+            school_class_data.num_of_active_classes = server.get_num_of_active_classes(self.class_code)
+            school_class_data.year_grades = current_year_grades_df
+            school_class_data.prev_year_grades = prev_year_grades_df
+            school_class_data.set_classes_roster(server.get_classes_roster(self.class_code))
+            # the school's behavior is only kept in the fact table, built from every school's rows
+            return school_class_data, self._build_school_behavior_facts(school_class_data, behavior_report)
+        except Exception:
+            raise
+        finally:
+            server.logout()
 
     def create_presence_summary_report(self, from_date: date, to_date: date) -> pd.DataFrame:
         self.assert_dates_in_range(from_date, to_date)
         presence_summary_df = pd.DataFrame(columns=['בית ספר'])
         for school_id, school_data in self.schools_data.items():
-            presence_filter = school_data.behavior_report['event_type'] == self.LessonEvents.PRESENCE
-            presence_df = school_data.behavior_report.loc[presence_filter, ['lesson_date', 'event_type', 'student_id']]
+            behavior_report = self.get_school_behavior_report(school_id)
+            presence_filter = behavior_report['event_type'] == self.LessonEvents.PRESENCE
+            presence_df = behavior_report.loc[presence_filter, ['lesson_date', 'event_type', 'student_id']]
             from_date = pd.to_datetime(from_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
             to_date = pd.to_datetime(to_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
             from_date_filter = presence_df['lesson_date'] >= pd.to_datetime(from_date)
@@ -372,11 +457,13 @@ class ReportMaker:
 
     def create_events_without_remarks_report(self, from_date: date, to_date: date) -> pd.DataFrame:
         self.assert_dates_in_range(from_date, to_date)
+        self.assert_behavior_columns_fetched(MashovServer.BEHAVIOR_COLUMNS)
         columns = ['שם המורה', 'מקצוע', 'תאריך', 'מספר שיעור', 'שם התלמיד', 'שכבה', 'כיתה', 'סוג האירוע',
                    'הערה מילולית', 'הוצדק ע"י', 'הצדקה', 'בית ספר', 'יום']
         events_without_remarks = pd.DataFrame(columns=columns)
         for school_id, school_data in self.schools_data.items():
-            no_remark_events_df = school_data.raw_behavior_report.drop('student_id', axis=1)
+            raw_behavior_report = self.get_school_behavior_report(school_id, raw_event_types=True)
+            no_remark_events_df = raw_behavior_report.drop('student_id', axis=1)
             from_date = pd.to_datetime(from_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
             to_date = pd.to_datetime(to_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
             from_date_filter = no_remark_events_df['lesson_date'] >= pd.to_datetime(from_date)
@@ -385,7 +472,7 @@ class ReportMaker:
             missing_filter = no_remark_events_df['event_type'] == self.LessonEvents.MISSING
             online_missing_filter = no_remark_events_df['event_type'] == self.LessonEvents.ONLINE_MISSING
             event_filter = missing_filter | online_missing_filter
-            remark_filter = no_remark_events_df['remark'].fillna('') == ''
+            remark_filter = no_remark_events_df['remark'].isna() | (no_remark_events_df['remark'] == '')
             justification_filter = no_remark_events_df['justification'] == self.NO_REMARKS
             no_remark_events_df = no_remark_events_df.loc[event_filter & (remark_filter & justification_filter)]
             no_remark_events_df['school_name'] = school_data.name
@@ -411,9 +498,10 @@ class ReportMaker:
         columns = ['בית ספר', 'נוכחים', 'חיסורים', 'חיזוקים', 'איחור', 'הפרעה', 'מצבת']
         middle_week_lessons_df = pd.DataFrame(columns=columns)
         for school_id, school_data in self.schools_data.items():
-            not_in_saturday_filter = school_data.behavior_report['lesson_date'].dt.weekday != calendar.SATURDAY
+            behavior_report = self.get_school_behavior_report(school_id)
+            not_in_saturday_filter = behavior_report['lesson_date'].dt.weekday != calendar.SATURDAY
             required_columns = ['lesson_date', 'event_type', 'student_id']
-            not_in_saturday_df = school_data.behavior_report.loc[not_in_saturday_filter, required_columns]
+            not_in_saturday_df = behavior_report.loc[not_in_saturday_filter, required_columns]
             from_date = pd.to_datetime(from_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
             to_date = pd.to_datetime(to_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
             from_date_filter = not_in_saturday_df['lesson_date'] >= pd.to_datetime(from_date)
@@ -440,6 +528,10 @@ class ReportMaker:
             middle_week_lessons_df = pd.concat([middle_week_lessons_df, curr_df], ignore_index=True)
         return middle_week_lessons_df
 
+    def assert_behavior_columns_fetched(self, columns: Sequence[str]):
+        missing_columns = [column for column in columns if column not in self.behavior_columns]
+        assert not missing_columns, f'עמודות ההתנהגות {", ".join(missing_columns)} לא הורדו מהשרת!'
+
     def assert_dates_in_range(self, from_date: date, to_date: date):
         current_date_range = f'{self.from_date.strftime(self.DATE_FORMAT)} - {self.to_date.strftime(self.DATE_FORMAT)}'
         required_date_range = f'{from_date.strftime(self.DATE_FORMAT)} - {to_date.strftime(self.DATE_FORMAT)}'
@@ -451,47 +543,37 @@ class ReportMaker:
         self.assert_dates_in_range(from_date, to_date)
         from_date = pd.to_datetime(from_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
         to_date = pd.to_datetime(to_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
-        const_columns = ['מורה אורגני', 'מתרגל', 'יח"ל', 'מצבת']
         periodic_attendance: Dict[str, pd.DataFrame] = dict()
         for school_id, school_data in self.schools_data.items():
-            all_behaviors = school_data.behavior_report.copy()
-            from_date_filter = all_behaviors['lesson_date'] >= pd.to_datetime(from_date)
-            to_date_filter = all_behaviors['lesson_date'] <= pd.to_datetime(to_date)
-            period_behavior_report = all_behaviors.loc[from_date_filter & to_date_filter]
+            behavior_df = self.get_school_behavior_report(school_id)
+            period_filter = (behavior_df['lesson_date'] >= from_date) & (behavior_df['lesson_date'] <= to_date)
+            period_behavior_report = behavior_df.loc[period_filter, ['lesson_date', 'class_num', 'student_id',
+                                                                     'event_type']]
             school_name = school_data.name
             # timedelta - to start week at sunday instead of monday, so Grouper by week will be correct
-            period_behavior_report['lesson_date'] = period_behavior_report['lesson_date'].dt.date + timedelta(days=1)
-            period_behavior_report['lesson_date'] = pd.to_datetime(
-                period_behavior_report['lesson_date'], format='%Y-%m-%d')
+            period_behavior_report = period_behavior_report.assign(
+                lesson_date=period_behavior_report['lesson_date'] + timedelta(days=1))
             # end
-            week_groups = period_behavior_report.groupby(pd.Grouper(key='lesson_date', freq='W'))
-            current_weeks_columns = [
-                self.get_date_range_of_week(w.year, w.week, w.month) for w in week_groups.groups.keys()]
-            current_school_columns = const_columns + current_weeks_columns
-            current_school_df = pd.DataFrame(columns=current_school_columns)
-            for class_num in range(1, school_data.num_of_active_classes + 1):
-                new_row_data = {
-                    'מורה אורגני': school_data.get_organic_teacher(class_num),
-                    'מתרגל': school_data.get_practitioner(class_num),
-                    'יח"ל': school_data.get_level(class_num),
-                    'מצבת': school_data.get_num_of_students(class_num)
-                }
-                for week_key in week_groups.groups.keys():
-                    try:
-                        week_df = week_groups.get_group(week_key)
-                    except KeyError:  # there are no data for that week
-                        continue
-                    presence_filter = week_df['event_type'] == self.LessonEvents.PRESENCE
-                    class_num_filter = week_df['class_num'] == class_num
-                    week_events = week_df.loc[presence_filter & class_num_filter, ['student_id', 'lesson_date']]
-                    presence_events_in_week_groups = week_events.groupby('lesson_date')
-                    if presence_events_in_week_groups.groups.keys():  # calculate average presence in that week
-                        num_of_presence = int(round(presence_events_in_week_groups.nunique().mean()))
-                    else:  # there is no presence events in that lesson
-                        num_of_presence = 0
-                    week_column_name = self.get_date_range_of_week(week_key.year, week_key.week, week_key.month)
-                    new_row_data[week_column_name] = num_of_presence
-                current_school_df = current_school_df.append(new_row_data, ignore_index=True)
+            weeks_sizes = period_behavior_report.groupby(pd.Grouper(key='lesson_date', freq='W')).size()
+            presence_filter = period_behavior_report['event_type'] == self.LessonEvents.PRESENCE
+            daily_presence = period_behavior_report.loc[presence_filter].groupby(
+                ['class_num', 'lesson_date'])['student_id'].nunique()
+            # the weekly presence of a class is the average of its daily distinct presents
+            weekly_presence = daily_presence.groupby(
+                [pd.Grouper(level='class_num'), pd.Grouper(level='lesson_date', freq='W')]).mean().round()
+            classes_nums = pd.Series(range(1, school_data.num_of_active_classes + 1))
+            weekly_presence = weekly_presence.unstack('lesson_date').reindex(index=classes_nums,
+                                                                             columns=weeks_sizes.index)
+            # a week with lessons but without presence of the class is 0, a week without any lesson stays empty
+            weeks_with_lessons = weeks_sizes.index[weeks_sizes.to_numpy() > 0]
+            weekly_presence[weeks_with_lessons] = weekly_presence[weeks_with_lessons].fillna(0)
+            weekly_presence.columns = [self.get_date_range_of_week(w.year, w.week, w.month) for w in weeks_sizes.index]
+            current_school_df = pd.concat([pd.DataFrame({
+                'מורה אורגני': school_data.map_organic_teachers(classes_nums),
+                'מתרגל': school_data.map_practitioners(classes_nums),
+                'יח"ל': school_data.map_levels(classes_nums),
+                'מצבת': classes_nums.map(school_data.get_num_of_students)
+            }), weekly_presence.reset_index(drop=True)], axis=1)
             periodic_attendance[school_name] = current_school_df
         return periodic_attendance
 
@@ -521,25 +603,13 @@ class ReportMaker:
         presence_by_month: Dict[str, pd.DataFrame] = dict()
         columns = ['בית ספר', 'מצבת'] + [MONTHS_IN_HEBREW[month_num] for month_num in
                                          range(from_date.month, to_date.month + 1)]
-        all_schools_behavior = pd.DataFrame()
-        for school_id, school_data in self.schools_data.items():
-            school_name = school_data.name
-            school_behavior_df = school_data.behavior_report.copy()
-            school_behavior_df.insert(0, 'school_name', school_name)
-            school_behavior_df['level'] = school_behavior_df['class_num'].apply(
-                self.schools_data[school_id].get_level)
-            all_schools_behavior = pd.concat([all_schools_behavior, school_behavior_df])
-        from_date_filter = all_schools_behavior['lesson_date'] >= pd.to_datetime(from_date)
-        to_date_filter = all_schools_behavior['lesson_date'] <= pd.to_datetime(to_date)
-        period_all_schools_behavior = all_schools_behavior.loc[from_date_filter & to_date_filter]
-        no_archive_filter = period_all_schools_behavior['level'] != MashovServer.ClassLevel.ARCHIVES
-        behavior_no_archive_df = period_all_schools_behavior.loc[no_archive_filter]
-        level_groups = behavior_no_archive_df.groupby('level')
-        for level in level_groups.groups.keys():
+        behavior_no_archive_df = self.get_behavior_facts(from_date, to_date)
+        level_groups = behavior_no_archive_df.groupby('level', observed=True)
+        for level in sorted(level_groups.groups.keys()):
             presence_by_month_df = pd.DataFrame(columns=columns)
             level_df = level_groups.get_group(level)
-            school_groups = level_df.groupby('school_name')
-            for school_name in school_groups.groups.keys():
+            school_groups = level_df.groupby('school_name', observed=True)
+            for school_name in sorted(school_groups.groups.keys()):
                 school_df = school_groups.get_group(school_name)
                 school_id = self._school_name_to_id_mapper.get(school_name)
                 num_of_students = self.schools_data[school_id].get_num_of_students_in_school()
@@ -581,12 +651,12 @@ class ReportMaker:
     def create_grades_colors_report_by_levels(self):
         all_schools_grades_df = self.get_all_schools_grades_df()
         grades_colors_by_level = dict()
-        levels_groups = all_schools_grades_df.groupby('level')
+        levels_groups = all_schools_grades_df.groupby('level', observed=True)
         for level_key in levels_groups.groups.keys():
             all_schools_df = pd.DataFrame()
             level_df = levels_groups.get_group(level_key)
             schools_grades = dict()
-            schools_groups = level_df.groupby('school_name')
+            schools_groups = level_df.groupby('school_name', observed=True)
             for school_key in schools_groups.groups.keys():
                 school_df = schools_groups.get_group(school_key)
                 exam_periods = dict()
@@ -619,20 +689,31 @@ class ReportMaker:
 
     def create_summary_report_by_schools(self, from_date: date, to_date: date) -> Dict[str, pd.DataFrame]:
         self.assert_dates_in_range(from_date, to_date)
-        all_schools_behavior_df = pd.DataFrame()
-        for school_id in self.schools_data.keys():
-            behavior_df = self.schools_data[school_id].behavior_report.copy()
-            school_name = self.schools_data[school_id].name
-            behavior_df['school_name'] = school_name
-            all_schools_behavior_df = pd.concat([all_schools_behavior_df, behavior_df])
         from_date = pd.to_datetime(from_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
         to_date = pd.to_datetime(to_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
-        from_date_filter = all_schools_behavior_df['lesson_date'] >= pd.to_datetime(from_date)
-        to_date_filter = all_schools_behavior_df['lesson_date'] <= pd.to_datetime(to_date)
-        period_behavior_report = all_schools_behavior_df.loc[from_date_filter & to_date_filter]
-        required_columns = ['lesson_date', 'school_name', 'class_num', 'lesson_num', 'student_id', 'event_type']
-        period_behavior_report = period_behavior_report[required_columns]
-        schools_groups = period_behavior_report.groupby('school_name')
+        schools_grades_dfs = []
+        for school_id, school_data in self.schools_data.items():
+            grades_df = school_data.all_grades_report
+            period_filter = (grades_df['exam_date'] >= from_date) & (grades_df['exam_date'] <= to_date)
+            schools_grades_dfs.append(grades_df.loc[period_filter].assign(school_id=school_id))
+        period_grades_report = pd.concat(schools_grades_dfs, ignore_index=True)
+        period_behavior_report = self.get_behavior_facts(from_date, to_date, drop_archives=False)
+        # a school is summarized if it has any lesson in the period, by the order of the schools names
+        schools_ids = sorted(period_behavior_report['school_id'].unique(), key=lambda _id: self.schools_data[_id].name)
+        lessons_counts = self.count_students_by_events(
+            period_behavior_report.loc[~period_behavior_report['is_archive']],
+            ['school_id', 'class_num', 'lesson_date', 'lesson_num'],
+            [self.LessonEvents.PRESENCE, self.LessonEvents.MISSING, self.LessonEvents.DISTURB])
+        lessons_counts.columns = ['נוכחים', 'חיסורים', 'הפרעה']
+        failed_column = f'נכשלים (מתחת {self.FAIL_GRADE_THRESHOLD})'
+        # failed students get a second id column, which is missing for the passing grades and so isn't counted
+        failed_students_ids = period_grades_report['student_id'].where(
+            period_grades_report['exam_grade'] < self.FAIL_GRADE_THRESHOLD)
+        exams_counts = period_grades_report.assign(failed_student_id=failed_students_ids).groupby(
+            ['school_id', 'class_num', 'exam_date']).agg(**{
+                'מגישים': ('student_id', 'nunique'),
+                failed_column: ('failed_student_id', 'nunique')
+            })
         schools_summary = dict()
         cols_order = [
             'טווח זמן',
@@ -647,58 +728,26 @@ class ReportMaker:
             'נוכחים',
             'חיסורים',
             'מגישים',
-            f'נכשלים (מתחת {self.FAIL_GRADE_THRESHOLD})',
+            failed_column,
             'הפרעה',
             'אחוז נוכחות'
         ]
-        for school_key in schools_groups.groups.keys():
-            school_id = self._school_name_to_id_mapper[school_key]
-            school_details_df = schools_groups.get_group(school_key)
-            school_details_df['level'] = school_details_df['class_num'].apply(
-                self.schools_data[school_id].get_level)
-            no_archive_filter = school_details_df['level'] != MashovServer.ClassLevel.ARCHIVES
-            school_details_df = school_details_df.loc[no_archive_filter]
-            lesson_groups = school_details_df.groupby(['class_num', 'lesson_date', 'lesson_num'])
-            school_summary_df = pd.DataFrame()
-            total_num_students = lesson_groups.apply(
-                lambda group: self.schools_data[school_id].get_num_of_students(group['class_num'].head(1).item()))
-            school_summary_df['מצבת'] = total_num_students
-            num_of_presence = lesson_groups.apply(
-                lambda group: group.loc[
-                    group['event_type'] == self.LessonEvents.PRESENCE, 'student_id'].nunique())
-            school_summary_df['נוכחים'] = num_of_presence
-            num_of_missing = lesson_groups.apply(
-                lambda group: group.loc[
-                    group['event_type'] == self.LessonEvents.MISSING, 'student_id'].nunique())
-            school_summary_df['חיסורים'] = num_of_missing
-            num_of_disturbs = lesson_groups.apply(
-                lambda group: group.loc[
-                    group['event_type'] == self.LessonEvents.DISTURB, 'student_id'].nunique())
-            school_summary_df['הפרעה'] = num_of_disturbs
+        for school_id in schools_ids:
+            school_data = self.schools_data[school_id]
+            school_filter = lessons_counts.index.get_level_values('school_id') == school_id
+            school_summary_df = lessons_counts.loc[school_filter].droplevel('school_id')
+            school_summary_df.insert(0, 'מצבת', school_summary_df.index.get_level_values('class_num').map(
+                school_data.get_num_of_students))
             try:
                 school_summary_df['אחוז נוכחות'] = round(
                     (school_summary_df['נוכחים'] / school_summary_df['מצבת']) * 100).astype(int).astype(str) + '%'
             except ZeroDivisionError:
                 school_summary_df['אחוז נוכחות'] = pd.NA
-            all_grades_report_df = self.schools_data[school_id].all_grades_report.copy()
-            from_date_filter = all_grades_report_df['exam_date'] >= pd.to_datetime(from_date)
-            to_date_filter = all_grades_report_df['exam_date'] <= pd.to_datetime(to_date)
-            period_grades_report = all_grades_report_df.loc[from_date_filter & to_date_filter]
-            period_grades_report.rename(columns={'exam_date': 'lesson_date'}, inplace=True)
-            grades_groups = period_grades_report.groupby(['class_num', 'lesson_date'])
-            num_of_testing_students = grades_groups.apply(lambda group: group['student_id'].nunique())
-            num_of_failed_students = grades_groups.apply(lambda group: group.loc[
-                group['exam_grade'] < self.FAIL_GRADE_THRESHOLD, 'student_id'].nunique())
-            if num_of_testing_students.empty:
-                num_of_testing_students = pd.Series()
-            if num_of_failed_students.empty:
-                num_of_failed_students = pd.Series()
-            num_of_testing_students.name = 'מגישים'
-            num_of_failed_students.name = f'נכשלים (מתחת {self.FAIL_GRADE_THRESHOLD})'
-            grades_summary_df = pd.concat([num_of_testing_students, num_of_failed_students], axis=1).reset_index()
+            school_filter = exams_counts.index.get_level_values('school_id') == school_id
+            grades_summary_df = exams_counts.loc[school_filter].droplevel('school_id').reset_index()
+            grades_summary_df.rename(columns={'exam_date': 'lesson_date'}, inplace=True)
             if not grades_summary_df.empty:
-                grades_summary_df['מצבת'] = grades_summary_df['class_num'].apply(
-                    self.schools_data[school_id].get_num_of_students)
+                grades_summary_df['מצבת'] = grades_summary_df['class_num'].apply(school_data.get_num_of_students)
                 try:
                     grades_summary_df['אחוז נוכחות'] = round(
                         (grades_summary_df['מגישים'] / grades_summary_df['מצבת']) * 100).astype(int).astype(str) + '%'
@@ -707,19 +756,15 @@ class ReportMaker:
                 grades_summary_df['lesson_num'] = 'בחינה'
             school_summary_df.reset_index(inplace=True)
             school_summary_df = pd.concat([school_summary_df, grades_summary_df], ignore_index=True)
-            cols_to_replace = ['מצבת', 'נוכחים', 'חיסורים', 'הפרעה', 'מגישים',
-                               f'נכשלים (מתחת {self.FAIL_GRADE_THRESHOLD})']
+            cols_to_replace = ['מצבת', 'נוכחים', 'חיסורים', 'הפרעה', 'מגישים', failed_column]
             school_summary_df[cols_to_replace] = school_summary_df[cols_to_replace].replace(0, pd.NA)
             school_summary_df.sort_values(['lesson_date', 'class_num', 'lesson_num'], ascending=[True, True, True],
                                           inplace=True, ignore_index=True)
             date_range = f'{from_date.strftime(format=self.DATE_FORMAT)}-{to_date.strftime(format=self.DATE_FORMAT)}'
             school_summary_df['טווח זמן'] = date_range
-            school_summary_df['יח"ל'] = school_summary_df['class_num'].apply(
-                self.schools_data[school_id].get_level)
-            school_summary_df['מורה אורגני'] = school_summary_df['class_num'].apply(
-                self.schools_data[school_id].get_organic_teacher)
-            school_summary_df['כיתה/קבוצת לימוד'] = school_summary_df['class_num'].apply(
-                self.schools_data[school_id].get_practitioner)
+            school_summary_df['יח"ל'] = school_data.map_levels(school_summary_df['class_num'])
+            school_summary_df['מורה אורגני'] = school_data.map_organic_teachers(school_summary_df['class_num'])
+            school_summary_df['כיתה/קבוצת לימוד'] = school_data.map_practitioners(school_summary_df['class_num'])
             school_summary_df['שכבה'] = self.class_code
             school_summary_df.rename(columns={
                 'lesson_date': 'תאריך שיעור',
@@ -729,7 +774,7 @@ class ReportMaker:
             school_summary_df = school_summary_df[cols_order]
             school_summary_df['סיבת החיסורים וטיפול בהפרעות (ואסים)'] = pd.NA
             school_summary_df['הערות'] = pd.NA
-            schools_summary[school_key] = school_summary_df
+            schools_summary[school_data.name] = school_summary_df
         if not schools_summary:
             for school_name in self._school_name_to_id_mapper.keys():
                 df = pd.DataFrame(columns=cols_order + ['סיבת החיסורים וטיפול בהפרעות (ואסים)', 'הערות'])
@@ -737,19 +782,17 @@ class ReportMaker:
         return schools_summary
 
     def create_raw_behavior_report_by_schools(self, from_date: date, to_date: date) -> Dict[str, pd.DataFrame]:
+        self.assert_behavior_columns_fetched(MashovServer.BEHAVIOR_COLUMNS)
+        from_date = pd.to_datetime(from_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
+        to_date = pd.to_datetime(to_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
+        period_behavior_facts = self.get_behavior_facts(from_date, to_date)
+        # the raw report shows the events as they were fetched, before calculate_most_common_event_type
+        period_behavior_facts = period_behavior_facts.assign(event_type=period_behavior_facts['raw_event_type'])
+        raw_columns = MashovServer.BEHAVIOR_COLUMNS + ['level', 'practitioner']
         raw_behavior_by_schools = dict()
         for school_id in self.schools_data.keys():
-            behavior_df = self.schools_data[school_id].raw_behavior_report.copy()
-            from_date = pd.to_datetime(from_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
-            to_date = pd.to_datetime(to_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
-            from_date_filter = behavior_df['lesson_date'] >= pd.to_datetime(from_date)
-            to_date_filter = behavior_df['lesson_date'] <= pd.to_datetime(to_date)
-            behavior_df = behavior_df.loc[from_date_filter & to_date_filter]
-            behavior_df['level'] = behavior_df['class_num'].apply(self.schools_data[school_id].get_level)
-            behavior_df['practitioner'] = behavior_df['class_num'].apply(
-                self.schools_data[school_id].get_practitioner)
-            no_archive_filter = behavior_df['level'] != MashovServer.ClassLevel.ARCHIVES
-            behavior_df = behavior_df.loc[no_archive_filter]
+            school_filter = period_behavior_facts['school_id'] == school_id
+            behavior_df = period_behavior_facts.loc[school_filter, raw_columns]
             column_names_mapper = {
                 'teacher_name': 'שם המורה',
                 'subject': 'מקצוע',
@@ -828,42 +871,39 @@ class ReportMaker:
                                            sort_columns_by_dates(avg_presence_report.columns[1:]), axis=1)
 
     def create_presence_distribution_report(self, from_date: date, to_date: date) -> pd.DataFrame:
-
-        def count_by_event(df: pd.DataFrame, event_type: str):
-            presence_counter_filter = df['סוג האירוע'] == event_type
-            return df.loc[presence_counter_filter, 'ת.ז'].nunique()
-
-        def calculate_student_presence(df: pd.DataFrame, num_of_lessons: int):
-            date_groups = df.groupby('תאריך')
-            num_of_presence = date_groups.apply(
-                lambda lesson_date: count_by_event(
-                    lesson_date, self.LessonEvents.PRESENCE) >= count_by_event(lesson_date, self.LessonEvents.MISSING
-                                                                               )).sum()  # false === 0, true === 1
-            return int(round((num_of_presence / num_of_lessons) * 100)) if num_of_lessons != 0 else pd.NA
-
-        behavior_df = self.create_raw_behavior_report_by_schools(from_date, to_date)
-        presence_distribution = pd.DataFrame(columns=['בית ספר', 'X>75%', '50%<X<75%', '10%<X<50%', 'X<10%', 'סה"כ'])
-        for school_name, school_df in behavior_df.items():
-            student_groups = school_df.groupby('ת.ז')
-            student_presence = student_groups.apply(
-                lambda student: calculate_student_presence(student, school_df['תאריך'].nunique()))
-            if student_presence.empty:
+        from_date = pd.to_datetime(from_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
+        to_date = pd.to_datetime(to_date.strftime(self.DATE_FORMAT), format=self.DATE_FORMAT)
+        counted_events = [self.LessonEvents.PRESENCE, self.LessonEvents.MISSING]
+        period_behavior_facts = self.get_behavior_facts(from_date, to_date)
+        presence_distribution_rows = []
+        for school_id, school_data in self.schools_data.items():
+            school_df = period_behavior_facts.loc[period_behavior_facts['school_id'] == school_id]
+            # the raw events of every student in every date, counted once into a (student, date) x event type matrix
+            events_matrix = school_df.groupby(['student_id', 'lesson_date', 'raw_event_type'], observed=True).size()
+            events_matrix = events_matrix.unstack('raw_event_type', fill_value=0).reindex(columns=counted_events,
+                                                                                          fill_value=0)
+            if events_matrix.empty:
                 continue
-            student_presence = student_presence.to_frame(name='average_presence')
-            above_75 = (75 < student_presence).sum().iloc[0]
-            from_50_to_75 = ((50 < student_presence) & (student_presence <= 75)).sum().iloc[0]
-            from_10_to_50 = ((10 < student_presence) & (student_presence <= 50)).sum().iloc[0]
-            under_10 = (student_presence <= 10).sum().iloc[0]
+            # a student is present in a date, unless there is a missing event and no presence event in it
+            present_dates = (events_matrix[self.LessonEvents.PRESENCE] > 0) | (
+                events_matrix[self.LessonEvents.MISSING] == 0)
+            num_of_lessons = school_df['lesson_date'].nunique()
+            students_presence = (present_dates.groupby(level='student_id').sum() / num_of_lessons * 100).round()
+            above_75 = int((75 < students_presence).sum())
+            from_50_to_75 = int(((50 < students_presence) & (students_presence <= 75)).sum())
+            from_10_to_50 = int(((10 < students_presence) & (students_presence <= 50)).sum())
+            under_10 = int((students_presence <= 10).sum())
             total = above_75 + from_50_to_75 + from_10_to_50 + under_10
-            data = {
-                'בית ספר': school_name,
+            presence_distribution_rows.append({
+                'בית ספר': school_data.name,
                 'X>75%': above_75,
                 '50%<X<75%': from_50_to_75,
                 '10%<X<50%': from_10_to_50,
                 'X<10%': under_10,
                 'סה"כ': total,
-            }
-            presence_distribution = presence_distribution.append(data, ignore_index=True)
+            })
+        presence_distribution = pd.DataFrame(presence_distribution_rows,
+                                             columns=['בית ספר', 'X>75%', '50%<X<75%', '10%<X<50%', 'X<10%', 'סה"כ'])
         sum_data = presence_distribution.drop('בית ספר', axis=1).sum().astype(int)
         sum_data = ['סה"כ'] + list(sum_data)
         presence_distribution.loc[len(presence_distribution)] = sum_data
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+import tempfile
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_server import BehaviorEventStore
+
+
+class FakeBehaviorServer:
+    def __init__(self, undated_events_count: int = 0):
+        self.undated_events_count = undated_events_count
+        self.fetched_ranges = []
+
+    def fetch_events(self, from_date: date, to_date: date) -> list:
+        self.fetched_ranges.append((from_date, to_date))
+        events = [{'lessonLog': {'lessonDate': (from_date + timedelta(days=i)).strftime('%Y-%m-%dT00:00:00')}}
+                  for i in range((to_date - from_date).days + 1)]
+        events += [{'lessonLog': {}, 'eventNum': i} for i in range(self.undated_events_count)]
+        return events
+
+
+class BehaviorEventStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = BehaviorEventStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def sync(self, server: FakeBehaviorServer, from_date: date, to_date: date) -> list:
+        return self.store.sync(1, 2024, 'ט', from_date, to_date, server.fetch_events)
+
+    @staticmethod
+    def get_days(events: list) -> set:
+        return {event['lessonLog']['lessonDate'][:10] for event in events if 'lessonDate' in event['lessonLog']}
+
+    def test_non_contiguous_ranges(self):
+        server = FakeBehaviorServer()
+        self.sync(server, date(2023, 10, 1), date(2023, 10, 31))
+        self.sync(server, date(2023, 8, 1), date(2023, 8, 15))
+        events = self.sync(server, date(2023, 8, 1), date(2023, 11, 10))
+        expected_days = {(date(2023, 8, 1) + timedelta(days=i)).isoformat() for i in range(102)}
+        self.assertEqual(self.get_days(events), expected_days)
+        self.assertEqual(len(events), 102)
+
+    def test_undated_events_merged_by_range(self):
+        server = FakeBehaviorServer(undated_events_count=2)
+        self.sync(server, date(2023, 10, 1), date(2023, 10, 31))
+        server.undated_events_count = 1
+        events = self.sync(server, date(2023, 10, 1), date(2023, 11, 30))
+        # the look-back fetch of october's tail doesn't replace the undated events of the whole of october
+        self.assertEqual(len([event for event in events if 'lessonDate' not in event['lessonLog']]), 2)
+        events = self.sync(server, date(2023, 10, 1), date(2023, 10, 10))
+        self.assertEqual(len([event for event in events if 'lessonDate' not in event['lessonLog']]), 2)
+        self.assertEqual(len(events), 12)
+
+    def test_undated_events_only_in_overlapping_ranges(self):
+        server = FakeBehaviorServer(undated_events_count=1)
+        self.sync(server, date(2023, 10, 1), date(2023, 10, 31))
+        server.undated_events_count = 0
+        events = self.sync(server, date(2023, 8, 1), date(2023, 8, 15))
+        self.assertEqual(len(events), 15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+from datetime import date, datetime, timedelta, timezone
+import urllib.parse
+import unittest
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_server import GradesDataset, MashovServer
+
+FROM_DATE, TO_DATE = MashovServer.get_school_year_dates(2024)
+
+
+def parse_server_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def query_server(grades_json: list, from_date: date, to_date: date) -> list:
+    # filters the grades by the start and end of the url a direct query sends, on full timestamps
+    url = MashovServer._get_api_url(MashovServer, 'grades', 'ט', from_date, to_date)
+    query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+    start, end = parse_server_datetime(query['start']), parse_server_datetime(query['end'])
+    matching_grades = []
+    for grade in grades_json:
+        try:
+            exam_datetime = parse_server_datetime(grade['gradingEvent']['eDate'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if start <= exam_datetime <= end:
+            matching_grades.append(grade)
+    return matching_grades
+
+
+def create_exam_date(rnd: random.Random) -> str:
+    exam_datetime = datetime.combine(FROM_DATE, datetime.min.time()) + timedelta(
+        days=rnd.randint(0, (TO_DATE - FROM_DATE).days), seconds=rnd.choice([0, 1, 43200, 86399]),
+        microseconds=rnd.choice([0, 0, 500000]))
+    exam_date = exam_datetime.isoformat()
+    return exam_date + rnd.choice(['', '', 'Z', '+02:00'])
+
+
+def create_grades(rnd: random.Random, num_of_grades: int, with_undated: bool) -> list:
+    grades = [{'grade': {'grade': i}, 'gradingEvent': {'eDate': create_exam_date(rnd)}} for i in range(num_of_grades)]
+    if with_undated:
+        grades += [{'grade': {'grade': -1}, 'gradingEvent': {}},
+                   {'grade': {'grade': -2}, 'gradingEvent': {'eDate': ''}}]
+    return grades
+
+
+def create_sub_range(rnd: random.Random):
+    first_day, last_day = sorted(rnd.randint(0, (TO_DATE - FROM_DATE).days) for _ in range(2))
+    return FROM_DATE + timedelta(days=first_day), FROM_DATE + timedelta(days=last_day)
+
+
+class GradesDatasetTest(unittest.TestCase):
+    NUM_OF_RANGES = 300
+
+    def test_sub_ranges_match_direct_query(self):
+        rnd = random.Random(0)
+        server_grades = create_grades(rnd, 400, with_undated=False)
+        dataset = GradesDataset(FROM_DATE, TO_DATE, query_server(server_grades, FROM_DATE, TO_DATE))
+        for _ in range(self.NUM_OF_RANGES):
+            from_date, to_date = create_sub_range(rnd)
+            self.assertTrue(dataset.covers(from_date, to_date))
+            self.assertEqual(dataset.get_grades(from_date, to_date), query_server(server_grades, from_date, to_date))
+
+    def test_undated_grades_are_left_to_the_server(self):
+        rnd = random.Random(1)
+        server_grades = create_grades(rnd, 100, with_undated=True)
+        dataset = GradesDataset(FROM_DATE, TO_DATE, server_grades)
+        self.assertTrue(dataset.covers(FROM_DATE, TO_DATE))
+        self.assertEqual(dataset.get_grades(FROM_DATE, TO_DATE), server_grades)
+        for _ in range(self.NUM_OF_RANGES):
+            from_date, to_date = create_sub_range(rnd)
+            if (from_date, to_date) != (FROM_DATE, TO_DATE):
+                self.assertFalse(dataset.covers(from_date, to_date))
+
+    def test_out_of_range(self):
+        dataset = GradesDataset(FROM_DATE, TO_DATE, [])
+        self.assertFalse(dataset.covers(FROM_DATE - timedelta(days=1), TO_DATE))
+        self.assertFalse(dataset.covers(FROM_DATE, TO_DATE + timedelta(days=1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import random
+import sys
+import os
+
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reports_maker import ReportMaker
+
+EVENTS = ReportMaker.LessonEvents
+EVENTS_TYPES = [EVENTS.PRESENCE, EVENTS.MISSING, EVENTS.ONLINE_MISSING, EVENTS.REINFORCEMENT, EVENTS.LATE,
+                EVENTS.DISTURB]
+
+
+def calculate_most_common_event_type_by_groups(behavior_report: pd.DataFrame) -> pd.DataFrame:
+    # the implementation before it was vectorized, group by group
+    def calculate_event(group_df: pd.DataFrame) -> str:
+        event_type_series = group_df['event_type']
+        if event_type_series.empty:
+            return ''
+        most_common_values = event_type_series.mode()
+        if len(most_common_values) > 1 and EVENTS.PRESENCE in most_common_values.tolist():
+            return EVENTS.PRESENCE
+        else:
+            return most_common_values.head(1).item()
+
+    groups = behavior_report.groupby(['lesson_date', 'class_num', 'student_id'])
+    for idx in groups.groups.keys():
+        group = groups.get_group(idx)
+        if len(group) > 1:
+            lesson_date, class_num, student_id = idx
+            date_filter = behavior_report['lesson_date'] == lesson_date
+            class_filter = behavior_report['class_num'] == class_num
+            id_filter = behavior_report['student_id'] == student_id
+            event = calculate_event(group)
+            if event == EVENTS.PRESENCE:
+                missing_filter = behavior_report['event_type'] == EVENTS.MISSING
+                online_missing = behavior_report['event_type'] == EVENTS.ONLINE_MISSING
+                event_filter = missing_filter | online_missing
+            elif event in (EVENTS.MISSING, EVENTS.ONLINE_MISSING):
+                event_filter = behavior_report['event_type'] == EVENTS.PRESENCE
+            else:
+                event_filter = None
+            if event_filter is not None:
+                behavior_report.loc[date_filter & class_filter & id_filter & event_filter, 'event_type'] = event
+    return behavior_report
+
+
+def create_behavior_report(rnd: random.Random, num_of_events: int, events_types: list) -> pd.DataFrame:
+    # few students, dates and classes, so most lessons have several events and many of them tie
+    lessons_dates = pd.date_range('2023-09-01', periods=4)
+    return pd.DataFrame({
+        'lesson_date': [rnd.choice(lessons_dates) for _ in range(num_of_events)],
+        'class_num': np.array([rnd.randint(1, 3) for _ in range(num_of_events)], dtype='int8'),
+        'student_id': np.array([rnd.randint(1, 4) for _ in range(num_of_events)], dtype='int64'),
+        'event_type': [rnd.choice(events_types) for _ in range(num_of_events)],
+    })
+
+
+class MostCommonEventTypeTest(unittest.TestCase):
+    NUM_OF_FRAMES = 200
+
+    def assert_same_as_by_groups(self, behavior_report: pd.DataFrame) -> None:
+        expected = calculate_most_common_event_type_by_groups(behavior_report.copy())
+        result = ReportMaker.calculate_most_common_event_type(behavior_report.copy())
+        pd.testing.assert_series_equal(result['event_type'].astype(object), expected['event_type'].astype(object))
+
+    def test_object_events(self):
+        rnd = random.Random(0)
+        for _ in range(self.NUM_OF_FRAMES):
+            events_types = rnd.sample(EVENTS_TYPES, rnd.randint(1, len(EVENTS_TYPES)))
+            self.assert_same_as_by_groups(create_behavior_report(rnd, rnd.randint(0, 60), events_types))
+
+    def test_categorical_events(self):
+        rnd = random.Random(1)
+        for _ in range(self.NUM_OF_FRAMES):
+            events_types = rnd.sample(EVENTS_TYPES, rnd.randint(1, len(EVENTS_TYPES)))
+            behavior_report = create_behavior_report(rnd, rnd.randint(0, 60), events_types)
+            # unused categories in a shuffled order, as the typed schema leaves them after filtering
+            categories = rnd.sample(EVENTS_TYPES, len(EVENTS_TYPES))
+            behavior_report['event_type'] = pd.Categorical(behavior_report['event_type'], categories=categories)
+            self.assert_same_as_by_groups(behavior_report)
+
+    def test_ties(self):
+        lessons_events = [
+            [EVENTS.PRESENCE, EVENTS.MISSING],
+            [EVENTS.MISSING, EVENTS.ONLINE_MISSING, EVENTS.PRESENCE],
+            [EVENTS.MISSING, EVENTS.LATE],
+            [EVENTS.LATE, EVENTS.ONLINE_MISSING, EVENTS.PRESENCE, EVENTS.PRESENCE, EVENTS.MISSING, EVENTS.MISSING],
+            [EVENTS.ONLINE_MISSING, EVENTS.PRESENCE, EVENTS.DISTURB, EVENTS.DISTURB],
+        ]
+        behavior_report = pd.DataFrame({
+            'lesson_date': pd.Timestamp('2023-09-01'),
+            'class_num': np.int8(1),
+            'student_id': [student_id for student_id, events in enumerate(lessons_events) for _ in events],
+            'event_type': [event for events in lessons_events for event in events],
+        })
+        self.assert_same_as_by_groups(behavior_report)
+        self.assert_same_as_by_groups(behavior_report.astype({'event_type': 'category'}))
+
+    def test_empty_groups(self):
+        rnd = random.Random(2)
+        for _ in range(self.NUM_OF_FRAMES):
+            behavior_report = create_behavior_report(rnd, rnd.randint(0, 60), EVENTS_TYPES)
+            # categorical keys with unused categories make the groupby of the old implementation yield empty groups
+            behavior_report['class_num'] = pd.Categorical(behavior_report['class_num'], categories=[1, 2, 3, 4, 5])
+            self.assert_same_as_by_groups(behavior_report)
+
+    def test_missing_keys(self):
+        rnd = random.Random(3)
+        for _ in range(self.NUM_OF_FRAMES):
+            behavior_report = create_behavior_report(rnd, rnd.randint(1, 60), EVENTS_TYPES)
+            behavior_report.loc[behavior_report.sample(frac=0.3, random_state=rnd.randint(0, 1000)).index,
+                                'lesson_date'] = pd.NaT
+            dated = behavior_report['lesson_date'].notna()
+            result = ReportMaker.calculate_most_common_event_type(behavior_report.copy())
+            # events without a lesson date belong to no lesson and keep their event type
+            pd.testing.assert_series_equal(result.loc[~dated, 'event_type'], behavior_report.loc[~dated, 'event_type'])
+            # and the dated events are calculated as if they weren't there
+            expected = calculate_most_common_event_type_by_groups(behavior_report.loc[dated].copy())
+            pd.testing.assert_series_equal(result.loc[dated, 'event_type'].astype(object),
+                                           expected['event_type'].astype(object))
+
+    def test_empty_report(self):
+        behavior_report = create_behavior_report(random.Random(4), 0, EVENTS_TYPES)
+        self.assert_same_as_by_groups(behavior_report)
+        self.assert_same_as_by_groups(behavior_report.astype({'event_type': 'category'}))
+
+
+if __name__ == '__main__':
+    unittest.main()